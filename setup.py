@@ -17,14 +17,15 @@ setup(
   url = 'https://github.com/iiiii7d/tegen',
   download_url = f'https://github.com/iiiii7d/tegen/archive/refs/tags/v{tegen.__version__}.tar.gz',
   keywords = ['tegen', 'terminal', 'game', 'engine', 'terminal game engine', 'game development'],
-  python_requires='>=3.6',
+  python_requires='>=3.7',
   package_data={
     'tegen': ['examples/*'],
   },
   install_requires=[
     "blessed",
     "wcwidth",
-    "pillow"
+    "pillow>=9.1",
+    "numpy"
   ],
   classifiers=[
     'Development Status :: 4 - Beta',
@@ -34,7 +35,6 @@ setup(
     'Natural Language :: English',
     'Programming Language :: Python',
     'Programming Language :: Python :: 3',
-    "Programming Language :: Python :: 3.6",
     "Programming Language :: Python :: 3.7",
     "Programming Language :: Python :: 3.8",
     "Programming Language :: Python :: 3.9",
@@ -2,5 +2,9 @@ from tegen.game import *
 from tegen.scene import *
 import tegen.objects
 import tegen.pixel
+import tegen.render
+import tegen.profiler
+import tegen.assets
+import tegen.collision
 
 __version__ = "0.1"
\ No newline at end of file
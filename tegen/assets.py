@@ -0,0 +1,203 @@
+from typing import Dict, List, Optional, Union
+import hashlib
+import inspect
+import json
+import os
+import struct
+import tempfile
+import numpy as np
+
+import tegen.pixel as pixel
+from tegen.pixel import ArrayPixelMap, PixelMap
+
+_MAGIC = b"TGNA"
+_VERSION = 1
+_HEADER = struct.Struct("<4sB3xIIii")
+_PLANES = (('back', np.uint8, 3), ('back_mask', np.bool_, None), ('fore', np.uint8, 3),
+           ('fore_mask', np.bool_, None), ('char', np.dtype('<u4'), None))
+
+def _default_directory() -> str:
+    """:meta private:"""
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "tegen")
+
+class AssetCache:
+    """A cache on disk of compiled maps of pixels, so that they are not generated again every run.
+    Each asset is stored in a binary file named after a hash of its source and the parameters it was generated with,
+    and is memory-mapped when loaded.
+
+    .. versionadded:: 0.2
+
+    :param directory: The directory to store the cache in, defaults to ``tegen`` in ``$XDG_CACHE_HOME`` or ``~/.cache``
+    :type directory: Optional[str]
+
+    .. py:attribute:: directory
+       :type: str
+
+       The directory that the cache is stored in
+
+       .. versionadded:: 0.2"""
+
+    def __init__(self, directory: Optional[str]=None):
+        self.directory = directory if directory is not None else _default_directory()
+        self._loaded: Dict[str, ArrayPixelMap] = {}
+
+    @staticmethod
+    def key(source: bytes, **params) -> str:
+        """Returns the key of an asset. Assets saved with another version of the cache format have other keys.
+
+        .. versionadded:: 0.2
+
+        :param bytes source: The contents of the source of the asset
+        :param params: The parameters that the asset is generated with, which must be serialisable as JSON
+        :rtype: str"""
+        h = hashlib.sha256()
+        h.update(_MAGIC + bytes([_VERSION]))
+        h.update(json.dumps(params, sort_keys=True).encode())
+        h.update(b"\0")
+        h.update(source)
+        return h.hexdigest()
+
+    def path(self, key: str) -> str:
+        """Returns the file path of an asset in the cache.
+
+        .. versionadded:: 0.2
+
+        :param str key: The key of the asset
+        :rtype: str"""
+        return os.path.join(self.directory, key[:2], key+".tgna")
+
+    def load(self, key: str) -> Optional[ArrayPixelMap]:
+        """Loads an asset from the cache, with its arrays memory-mapped from the file.
+        Changes to the arrays are not written to the file. An asset loaded again is the same object.
+
+        .. versionadded:: 0.2
+
+        :param str key: The key of the asset
+        :returns: The asset, or ``None`` if it is not in the cache or the file is not valid
+        :rtype: Optional[ArrayPixelMap]"""
+        if key in self._loaded: return self._loaded[key]
+        fp = self.path(key)
+        try:
+            with open(fp, "rb") as f: header = f.read(_HEADER.size)
+            if len(header) != _HEADER.size: return None
+            magic, version, width, height, ox, oy = _HEADER.unpack(header)
+            if magic != _MAGIC or version != _VERSION: return None
+            planes = {}
+            offset = _HEADER.size
+            for name, dtype, channels in _PLANES:
+                shape = (height, width) if channels is None else (height, width, channels)
+                planes[name] = np.memmap(fp, dtype=dtype, mode='c', offset=offset, shape=shape) \
+                    if width*height != 0 else np.zeros(shape, dtype=dtype)
+                offset += int(np.prod(shape))*np.dtype(dtype).itemsize
+        except (OSError, ValueError):
+            return None
+        result = ArrayPixelMap(origin=(ox, oy), **planes)
+        self._loaded[key] = result
+        return result
+
+    def save(self, key: str, pixels: ArrayPixelMap):
+        """Saves an asset to the cache.
+
+        .. versionadded:: 0.2
+
+        :param str key: The key of the asset
+        :param ArrayPixelMap pixels: The asset"""
+        fp = self.path(key)
+        os.makedirs(os.path.dirname(fp), exist_ok=True)
+        width, height = pixels.size()
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(fp), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(_HEADER.pack(_MAGIC, _VERSION, width, height, *pixels.origin))
+                for name, dtype, _ in _PLANES:
+                    f.write(np.ascontiguousarray(getattr(pixels, name), dtype=dtype).tobytes())
+            os.replace(tmp, fp)
+        except BaseException:
+            if os.path.exists(tmp): os.remove(tmp)
+            raise
+        self._loaded[key] = pixels
+
+    def clear(self):
+        """Deletes every asset in the cache.
+
+        .. versionadded:: 0.2"""
+        self._loaded.clear()
+        if not os.path.isdir(self.directory): return
+        for d in os.listdir(self.directory):
+            d = os.path.join(self.directory, d)
+            if not os.path.isdir(d): continue
+            for f in os.listdir(d):
+                if f.endswith(".tgna"): os.remove(os.path.join(d, f))
+
+    def from_image(self, fp: str, as_array: bool=False, **kwargs) -> Union[PixelMap, ArrayPixelMap]:
+        """Same as :py:func:`tegen.pixel.from_image`, but loaded from the cache if the image was generated before
+        with the same parameters.
+
+        .. versionadded:: 0.2
+
+        :param str fp: The file path of the image
+        :param bool as_array: Whether to return an :py:class:`~tegen.pixel.ArrayPixelMap` instead of a :py:data:`~tegen.pixel.PixelMap`
+        :param kwargs: The other parameters of :py:func:`tegen.pixel.from_image`
+        :rtype: PixelMap or ArrayPixelMap"""
+        with open(fp, "rb") as f: source = f.read()
+        params = inspect.signature(pixel.from_image).bind(fp, **kwargs)
+        params.apply_defaults()
+        # the same asset is cached whatever the path or form it is returned in
+        params = {k: v for k, v in params.arguments.items() if k not in ('fp', 'as_array')}
+        key = self.key(source, kind="image", **params)
+        result = self.load(key)
+        if result is None:
+            result = pixel.from_image(fp, as_array=True, **kwargs)
+            self.save(key, result)
+        return result if as_array else result.to_dict()
+
+    def from_2d_array(self, back: Optional[List[List[str]]]=None, fore: Optional[List[List[str]]]=None,
+                      char: Optional[List[str]]=None, anchor: str='tl',
+                      as_array: bool=False) -> Union[PixelMap, ArrayPixelMap]:
+        """Same as :py:func:`tegen.pixel.from_2d_array`, but loaded from the cache if the arrays were generated before.
+
+        .. versionadded:: 0.2
+
+        :param List[List[str]] back: A list of lists of colours as the background
+        :param List[List[str]] fore: A list of lists of colours as the foreground
+        :param List[str] char: A list of strings as rows as the characters
+        :param str anchor: The corner to set the local coordinate as ``(0, 0)``, choose from ``tr``, ``tl``, ``br``, ``bl``, ``center``
+        :param bool as_array: Whether to return an :py:class:`~tegen.pixel.ArrayPixelMap` instead of a :py:data:`~tegen.pixel.PixelMap`
+        :rtype: PixelMap or ArrayPixelMap"""
+        source = json.dumps([back, fore, char]).encode()
+        key = self.key(source, kind="2d_array", anchor=anchor)
+        result = self.load(key)
+        if result is None:
+            result = pixel.from_2d_array(back, fore, char, anchor, as_array=True)
+            self.save(key, result)
+        if as_array: return result
+        return _to_dict_2d(result, [name for name, a in (('back', back), ('fore', fore), ('char', char)) if a is not None])
+
+def _to_dict_2d(pixels: ArrayPixelMap, names: List[str]) -> PixelMap:
+    """Converts a map of pixels to a :py:data:`~tegen.pixel.PixelMap` the same as :py:func:`tegen.pixel.from_2d_array`
+    returns, with every cell and only the layers in ``names``, instead of only the pixels with something set.
+
+    :meta private:"""
+    ox, oy = pixels.origin
+    width, height = pixels.size()
+    set_ = pixels.to_dict()
+    result = {}
+    for y in range(height):
+        for x in range(width):
+            info = set_.get((x-ox, y-oy), {})
+            result[x-ox, y-oy] = {name: info.get(name) for name in names}
+    return result
+
+
+_default: Optional[AssetCache] = None
+
+def default_cache() -> AssetCache:
+    """Returns the asset cache in the default directory, created when first called.
+
+    .. versionadded:: 0.2
+
+    :rtype: AssetCache"""
+    global _default
+    if _default is None: _default = AssetCache()
+    return _default
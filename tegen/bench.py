@@ -0,0 +1,218 @@
+"""Benchmarks of the frame pipeline, run with ``python -m tegen.bench``.
+
+Each scene is run headless at each terminal size with :py:meth:`tegen.Game.step`, and the time per frame spent
+in updates, collisions, composing and encoding is reported, along with the number of bytes of terminal output per frame."""
+from typing import Callable, Dict, List, Tuple
+import argparse
+import json
+import os
+import random
+import statistics
+import tempfile
+import time
+import numpy as np
+from PIL import Image
+
+import tegen
+from tegen.objects import Object, Sprite, Text, TileMap
+from tegen.profiler import Profiler
+from tegen.render import Encoder
+import tegen.pixel as pixel
+
+SIZES: List[Tuple[int, int]] = [(80, 24), (120, 40), (200, 60)]
+
+
+class _Mover(Sprite):
+    """:meta private:"""
+    pixels = pixel.from_2d_array(fore=[['f00', 'aaa', 'f00'],
+                                       ['aaa', 'f00', 'aaa'],
+                                       ['f00', 'aaa', 'f00']],
+                                 char=['███',
+                                       '███',
+                                       '███'])
+    dx = 1
+
+    def update(self, g):
+        lx, rx, _, _ = g.screen.edges()
+        if self.x <= lx: self.dx = 1
+        elif self.x >= rx-2: self.dx = -1
+        self.x += self.dx
+
+
+class _ArrayMover(_Mover):
+    """:meta private:"""
+    pixels = pixel.ArrayPixelMap.from_dict(_Mover.pixels)
+
+
+class _Counter(Text):
+    """:meta private:"""
+    count = 0
+
+    def update(self, g):
+        self.count += 1
+        self.text = "frame " + str(self.count)
+
+
+class _Listener(Object):
+    """:meta private:"""
+    presses = 0
+
+    def on_keyboard_press(self, g, key):
+        self.presses += 1
+
+
+class _Typist(Object):
+    """:meta private:"""
+    keys_per_frame = 50
+
+    def update(self, g):
+        for _ in range(self.keys_per_frame):
+            g.call_event("keyboard_press", "a")
+
+
+def _scatter(game: tegen.Game, n: int, make: Callable[[int], Object], seed: int=0):
+    """:meta private:"""
+    rng = random.Random(seed)
+    lx, rx, ty, by = game.screen.edges()
+    for i in range(n):
+        game.add_object(make(i), "obj"+str(i), rng.randint(lx, rx), rng.randint(ty, by))
+
+def scene_sprites(game: tegen.Game, n: int):
+    """``n`` moving 3x3 sprites with :py:data:`~tegen.pixel.PixelMap` pixels."""
+    _scatter(game, n, lambda i: _Mover())
+
+def scene_array_sprites(game: tegen.Game, n: int):
+    """``n`` moving 3x3 sprites with :py:class:`~tegen.pixel.ArrayPixelMap` pixels."""
+    _scatter(game, n, lambda i: _ArrayMover())
+
+def scene_texts(game: tegen.Game, n: int):
+    """``n`` texts that change every frame."""
+    _scatter(game, n, lambda i: _Counter("frame 0", fore=(255, 165, 0)))
+
+def scene_images(game: tegen.Game, n: int):
+    """``n`` sprites from 128x64 images, half of them moving."""
+    rng = random.Random(0)
+    with tempfile.TemporaryDirectory() as d:
+        fp = os.path.join(d, "bench.png")
+        data = bytes(rng.randrange(256) for _ in range(128*64*3))
+        Image.frombytes("RGB", (128, 64), data).save(fp)
+        pixels = pixel.from_image(fp, as_array=True)
+
+    def make(i: int) -> Object:
+        sprite = _ArrayMover() if i % 2 == 0 else Sprite()
+        sprite.pixels = pixels
+        return sprite
+    _scatter(game, n, make)
+
+def scene_keyboard(game: tegen.Game, n: int):
+    """``n`` objects listening for key presses and ``n`` decorations that do not, with 50 key presses a frame."""
+    _scatter(game, n, lambda i: _Listener())
+    for i in range(n):
+        game.add_object(Sprite(), "deco"+str(i), i % game.screen.width, i % game.screen.height)
+    game.add_object(_Typist(), "typist", 0, 0)
+
+class _Camera(Object):
+    """:meta private:"""
+
+    def update(self, g):
+        g.screen.x += 1
+
+def scene_tilemap(game: tegen.Game, n: int):
+    """A tile map of ``n`` by ``n`` chunks of random tiles, scrolled every frame."""
+    rng = np.random.default_rng(0)
+    tiles = [pixel.from_2d_array(back=[[c, c]], char=['..'], as_array=True) for c in ('0a0', '080', '886')]
+    tilemap = TileMap(tiles)
+    for cy in range(n):
+        for cx in range(n):
+            tilemap.chunk(cx, cy, create=True)[...] = rng.integers(TileMap.EMPTY, len(tiles), (tilemap.chunk_size,)*2)
+    game.add_object(tilemap, "tilemap", 0, 0)
+    game.add_object(_Camera(), "camera", 0, 0)
+
+SCENES: Dict[str, Callable[[tegen.Game, int], None]] = {
+    'sprites': scene_sprites,
+    'array_sprites': scene_array_sprites,
+    'texts': scene_texts,
+    'images': scene_images,
+    'keyboard': scene_keyboard,
+    'tilemap': scene_tilemap,
+}
+
+
+def run(scene: str, n: int, size: Tuple[int, int], frames: int=100, warmup: int=10) -> Dict[str, float]:
+    """Runs a scene headless and times its frames. Each frame is run with :py:meth:`tegen.Game.step`,
+    with the profiler of the game enabled, then encoded as it would be written to the terminal.
+
+    :param str scene: The name of the scene, one of :py:data:`SCENES`
+    :param int n: The number of objects in the scene
+    :param size: The size of the screen, in the form ``(width, height)``
+    :type size: Tuple[int, int]
+    :param int frames: The number of frames to time
+    :param int warmup: The number of frames to run before timing
+    :returns: The median milliseconds per frame of ``update``, ``collision``, ``compose``, ``encode`` and ``total``,
+       and the mean ``bytes`` of terminal output per frame
+    :rtype: Dict[str, float]"""
+    game = tegen.Game(headless=True, size=size)
+    SCENES[scene](game, n)
+    encoder = Encoder(None)
+    times = {'encode': [], 'total': []}
+    sizes = []
+    for frame in range(warmup+frames):
+        if frame == warmup:
+            game.profiler = Profiler(frames)
+            game.profiler.enabled = True
+        start = time.perf_counter()
+        game.step(1/60)
+        stepped = time.perf_counter()
+        # headless games do not encode, the previous frame is left in the back buffer to diff against
+        out = encoder.diff(game.back_buffer, game.front_buffer)
+        encoded = time.perf_counter()
+        if frame < warmup: continue
+        times['encode'].append(encoded-stepped)
+        times['total'].append(encoded-start)
+        sizes.append(len(out.encode()))
+    phases = game.profiler.phases
+    updates = [sum(t) for t in zip(phases['pre_update'], phases['update'], phases['post_update'])]
+    result = {'update': statistics.median(updates),
+              'collision': statistics.median(phases['collision']),
+              'compose': statistics.median(phases['compose'])}
+    result.update({name: 1000*statistics.median(values) for name, values in times.items()})
+    result['bytes'] = statistics.mean(sizes)
+    return result
+
+
+def main(argv: List[str]=None):
+    """The entry point of ``python -m tegen.bench``.
+
+    :param List[str] argv: The command line arguments, defaults to :py:data:`sys.argv`"""
+    parser = argparse.ArgumentParser(prog="python -m tegen.bench", description="Benchmarks the tegen frame pipeline.")
+    parser.add_argument("-s", "--scene", action="append", choices=list(SCENES.keys()),
+                        help="scene to run, can be repeated (default: all)")
+    parser.add_argument("-n", "--objects", type=int, action="append",
+                        help="number of objects in each scene, can be repeated (default: 10 and 100)")
+    parser.add_argument("--size", action="append", metavar="WxH",
+                        help="terminal size, can be repeated (default: 80x24, 120x40, 200x60)")
+    parser.add_argument("-f", "--frames", type=int, default=100, help="frames to time (default: 100)")
+    parser.add_argument("--json", action="store_true", help="print results as JSON lines")
+    args = parser.parse_args(argv)
+
+    scenes = args.scene or list(SCENES.keys())
+    counts = args.objects or [10, 100]
+    sizes = SIZES if not args.size else [tuple(int(v) for v in s.lower().split("x")) for s in args.size]
+    if not args.json:
+        print(f"{'scene':<14}{'n':>6}{'size':>9}{'update':>9}{'collide':>9}{'compose':>9}{'encode':>9}{'total':>9}"
+              f"{'bytes':>10}")
+        print(f"{'':<14}{'':>6}{'':>9}{'ms':>9}{'ms':>9}{'ms':>9}{'ms':>9}{'ms':>9}{'/frame':>10}")
+    for scene in scenes:
+        for n in counts:
+            for size in sizes:
+                result = run(scene, n, size, frames=args.frames)
+                if args.json:
+                    print(json.dumps({'scene': scene, 'n': n, 'size': list(size), **result}))
+                else:
+                    print(f"{scene:<14}{n:>6}{'%dx%d' % size:>9}{result['update']:>9.3f}{result['collision']:>9.3f}"
+                          f"{result['compose']:>9.3f}{result['encode']:>9.3f}{result['total']:>9.3f}"
+                          f"{result['bytes']:>10.0f}", flush=True)
+
+
+if __name__ == "__main__":
+    main()
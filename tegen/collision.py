@@ -0,0 +1,191 @@
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+
+from tegen.objects import Sprite
+
+Box = Tuple[int, int, int, int]
+Cells = Tuple[int, int, int, int]
+
+class CollisionWorld:
+    """Finds which sprites overlap. The edges of each sprite are kept in a grid of cells,
+    so only sprites sharing a cell are checked against each other, and two sprites only collide where
+    both have pixels, as found by :py:meth:`Sprite.occupancy() <tegen.objects.Sprite.occupancy>`.
+
+    Sprites are added and removed by the game, and moved in the grid by :py:meth:`sync`,
+    which only moves the sprites whose edges changed. Sprites are checked as they were when last synced.
+
+    .. versionadded:: 0.2
+
+    :param int cell_size: The width and height of each cell of the grid
+
+    .. py:attribute:: cell_size
+       :type: int
+
+       The width and height of each cell of the grid
+
+       .. versionadded:: 0.2"""
+
+    def __init__(self, cell_size: int=8):
+        if cell_size <= 0:
+            raise ValueError("'cell_size' must be positive")
+        self.cell_size = cell_size
+        self._cells: Dict[Tuple[int, int], Dict[int, Sprite]] = {}
+        self._entries: Dict[int, list] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, obj: Sprite) -> bool:
+        return id(obj) in self._entries
+
+    def _box(self, obj: Sprite) -> Optional[Box]:
+        """:meta private:"""
+        lx, rx, ty, by = obj.edges()
+        if lx > rx or ty > by: return None
+        return int(lx), int(rx), int(ty), int(by)
+
+    def _snapshot(self, obj: Sprite) -> Tuple[Optional[Box], Optional[np.ndarray]]:
+        """:meta private:"""
+        # the edges and occupancy are read together, so that the mask is always the size of the box
+        box = self._box(obj)
+        return box, None if box is None else obj.occupancy()
+
+    def _cells_of(self, box: Optional[Box]) -> Optional[Cells]:
+        """:meta private:"""
+        if box is None: return None
+        size = self.cell_size
+        return box[0]//size, box[1]//size, box[2]//size, box[3]//size
+
+    def _insert(self, obj: Sprite, cells: Optional[Cells]):
+        """:meta private:"""
+        if cells is None: return
+        for cx in range(cells[0], cells[1]+1):
+            for cy in range(cells[2], cells[3]+1):
+                self._cells.setdefault((cx, cy), {})[id(obj)] = obj
+
+    def _remove(self, obj: Sprite, cells: Optional[Cells]):
+        """:meta private:"""
+        if cells is None: return
+        for cx in range(cells[0], cells[1]+1):
+            for cy in range(cells[2], cells[3]+1):
+                bucket = self._cells[cx, cy]
+                del bucket[id(obj)]
+                if len(bucket) == 0: del self._cells[cx, cy]
+
+    def add(self, obj: Sprite):
+        """Adds a sprite to the world.
+
+        .. versionadded:: 0.2
+
+        :param Sprite obj: The sprite to add"""
+        if id(obj) in self._entries: self.remove(obj)
+        box, mask = self._snapshot(obj)
+        cells = self._cells_of(box)
+        self._entries[id(obj)] = [obj, box, cells, mask]
+        self._insert(obj, cells)
+
+    def remove(self, obj: Sprite):
+        """Removes a sprite from the world, if it is in it.
+
+        .. versionadded:: 0.2
+
+        :param Sprite obj: The sprite to remove"""
+        entry = self._entries.pop(id(obj), None)
+        if entry is not None: self._remove(obj, entry[2])
+
+    def sync(self):
+        """Reads the edges and pixels of every sprite again, and moves the sprites whose edges changed in the grid.
+        Called by the game after every update.
+
+        .. versionadded:: 0.2"""
+        for entry in self._entries.values():
+            obj = entry[0]
+            box, entry[3] = self._snapshot(obj)
+            if box == entry[1]: continue
+            entry[1] = box
+            cells = self._cells_of(box)
+            if cells == entry[2]: continue
+            self._remove(obj, entry[2])
+            self._insert(obj, cells)
+            entry[2] = cells
+
+    def collides(self, a: Sprite, b: Sprite) -> bool:
+        """Returns whether two sprites in the world overlap, where both have pixels.
+
+        .. versionadded:: 0.2
+
+        :param Sprite a: The first sprite
+        :param Sprite b: The second sprite
+        :rtype: bool"""
+        entry_a, entry_b = self._entries[id(a)], self._entries[id(b)]
+        if entry_a[1] is None or entry_b[1] is None: return False
+        return _overlap(entry_a[1], entry_b[1], entry_a[3], entry_b[3])
+
+    def pairs(self) -> List[Tuple[Sprite, Sprite]]:
+        """Returns every pair of sprites that overlap, each pair once.
+
+        .. versionadded:: 0.2
+
+        :rtype: List[Tuple[Sprite, Sprite]]"""
+        result = []
+        size = self.cell_size
+        entries = self._entries
+        for (cx, cy), bucket in self._cells.items():
+            if len(bucket) < 2: continue
+            objs = list(bucket.values())
+            boxes = [entries[id(obj)][1] for obj in objs]
+            masks = [entries[id(obj)][3] for obj in objs]
+            for i, (a, box_a, mask_a) in enumerate(zip(objs, boxes, masks)):
+                alx, arx, aty, aby = box_a
+                for b, box_b, mask_b in zip(objs[i+1:], boxes[i+1:], masks[i+1:]):
+                    blx, brx, bty, bby = box_b
+                    lx, ty = alx if alx > blx else blx, aty if aty > bty else bty
+                    if lx > (arx if arx < brx else brx) or ty > (aby if aby < bby else bby): continue
+                    # a pair sharing many cells is only checked in the cell with the topleft corner of the overlap
+                    if lx//size != cx or ty//size != cy: continue
+                    if _overlap(box_a, box_b, mask_a, mask_b): result.append((a, b))
+        return result
+
+    def query_rect(self, lx: int, rx: int, ty: int, by: int) -> List[Sprite]:
+        """Returns the sprites that have pixels in a rectangle.
+
+        .. versionadded:: 0.2
+
+        :param int lx: The global x coordinate of the leftmost column of the rectangle
+        :param int rx: The global x coordinate of the rightmost column of the rectangle
+        :param int ty: The global y coordinate of the topmost row of the rectangle
+        :param int by: The global y coordinate of the bottommost row of the rectangle
+        :rtype: List[Sprite]"""
+        if lx > rx or ty > by: return []
+        size = self.cell_size
+        rect = (lx, rx, ty, by)
+        found = {}
+        for cx in range(lx//size, rx//size+1):
+            for cy in range(ty//size, by//size+1):
+                for key, obj in self._cells.get((cx, cy), {}).items():
+                    if key in found: continue
+                    entry = self._entries[key]
+                    found[key] = obj if _overlap(entry[1], rect, entry[3], None) else None
+        return [obj for obj in found.values() if obj is not None]
+
+    def query_point(self, x: int, y: int) -> List[Sprite]:
+        """Returns the sprites that have a pixel at a point.
+
+        .. versionadded:: 0.2
+
+        :param int x: The global x coordinate
+        :param int y: The global y coordinate
+        :rtype: List[Sprite]"""
+        return self.query_rect(x, x, y, y)
+
+
+def _overlap(box_a: Box, box_b: Box, mask_a: np.ndarray, mask_b: Optional[np.ndarray]) -> bool:
+    """:meta private:"""
+    lx, rx = max(box_a[0], box_b[0]), min(box_a[1], box_b[1])
+    ty, by = max(box_a[2], box_b[2]), min(box_a[3], box_b[3])
+    if lx > rx or ty > by: return False
+    area = np.s_[ty-box_a[2]:by-box_a[2]+1, lx-box_a[0]:rx-box_a[0]+1]
+    mask = mask_a[area]
+    if mask_b is None: return bool(mask.any())
+    area = np.s_[ty-box_b[2]:by-box_b[2]+1, lx-box_b[0]:rx-box_b[0]+1]
+    return bool((mask & mask_b[area]).any())
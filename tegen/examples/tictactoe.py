@@ -54,7 +54,7 @@ class Notif(tegen.objects.Text):
         piece_x = g.objects["label" + str(key)].x-2
         piece_y = g.objects["label" + str(key)].y-1
         piece = XPiece if self.turn == 1 else OPiece
-        if "piece" + str(key) in g.objects.keys(): return
+        if g.has_object("piece" + str(key)): return
         game.add_object(piece(), "piece" + str(key), piece_x, piece_y)
 
         locations = self.x_locations if piece == XPiece else self.o_locations
@@ -1,18 +1,49 @@
 from typing import Union, Tuple, Optional, Dict, List
 import blessed
+import asyncio
+import bisect
+import contextlib
+import functools
+import inspect
 import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
 import time
 import math
+import queue
+import signal
 import traceback
 
 from tegen.scene import Scene
-from tegen.objects import Screen, Sprite, Object, Text, TextInput
-import tegen.pixel as pixel
+from tegen.objects import Screen, Sprite, Object, Text, TextInput, TileMap
+from tegen.render import FrameBuffer, Encoder
+from tegen.profiler import Profiler
+from tegen.collision import CollisionWorld
+import tegen.render as render
+
+class StopPropagation(Exception):
+    """Raised in an event handler to stop the event from reaching the remaining objects, see :py:meth:`Game.call_event`.
+
+    .. versionadded:: 0.2"""
+
 
 class Game:
     """The entry point for the game.
     
     .. versionadded:: 0.0
+
+    .. versionchanged:: 0.2
+       Added ``workers``, ``headless`` and ``size``. Object methods are run in the calling thread unless ``workers`` is set
+
+    :param workers: If set, the number of threads to run the methods of objects on.
+       Each of :py:meth:`Object.pre_update`, :py:meth:`Object.update` and :py:meth:`Object.post_update`
+       finishes on all objects before the next starts
+    :type workers: Optional[int]
+    :param bool headless: Whether to draw frames only into :py:attr:`front_buffer`, without a terminal.
+       Frames can be read with :py:meth:`screenshot`, and the game can be run frame by frame with :py:meth:`step`
+    :param size: The size of the screen in the form ``(width, height)``, only used when ``headless``. Defaults to ``(80, 24)``
+    :type size: Optional[Tuple[int, int]]
+    :raises ValueError: if ``workers`` is not positive
     
     .. py:attribute:: game_on
        :type: bool
@@ -31,9 +62,34 @@ class Game:
     .. py:attribute:: keyboard_listener
        :type: threading.Thread
 
-       The keyboard listening thread of the game.
+       The keyboard listening thread of the game, which puts keys in :py:attr:`input_queue`.
 
        .. versionadded:: 0.0
+
+    .. py:attribute:: input_queue
+       :type: queue.SimpleQueue
+
+       The keys read but not yet handled, as tuples in the form ``(key, time read)``.
+       It is emptied at the start of every frame, firing a ``keyboard_press`` event for each key in order,
+       or passing it to :py:attr:`current_text_input` if set.
+
+       .. versionadded:: 0.2
+
+    .. py:attribute:: coalesce_repeats
+       :type: bool
+
+       Whether the same key read more than once in a row in one frame only fires one event, eg when held down
+
+       .. versionadded:: 0.2
+
+    .. py:attribute:: key_hold
+       :type: float
+
+       The number of seconds after a key is read that :py:meth:`is_pressed` counts it as pressed.
+       Terminals do not report when keys are released, so set this above the key repeat delay of the terminal
+       for held keys to count as pressed between repeats
+
+       .. versionadded:: 0.2
        
     .. py:attribute:: objects
        :type: Dict[object, dict]
@@ -42,6 +98,12 @@ class Game:
        
        .. versionadded:: 0.0
 
+       .. versionchanged:: 0.2
+          Not changed in place, objects are added or removed in a new dict which replaces it,
+          so a reference to the dict can be iterated safely. Objects added or removed during a frame, from any thread,
+          are added or removed when the frame ends.
+          Use :py:meth:`has_object` and :py:meth:`get_object` to include the changes that have not been applied yet
+
     .. py:attribute:: screen
        :type: Screen
 
@@ -57,79 +119,452 @@ class Game:
        .. versionadded:: 0.0
 
     .. py:attribute:: speeds
-       :type: List[float]
+       :type: deque
 
-       A list of milliseconds per frame.
+       The milliseconds per frame of the last 100 frames.
 
        .. versionadded:: 0.0
+
+       .. versionchanged:: 0.2
+          Now a :py:class:`collections.deque`
        
     .. py:attribute:: current_text_input
        :type: TextInput
        
        The text input that is currently triggered. Is ``None`` if there is no inputs triggered.
        
-       .. versionadded:: 0.1"""
-    
-    term = blessed.Terminal()
+       .. versionadded:: 0.1
+
+    .. py:attribute:: front_buffer
+       :type: FrameBuffer
+
+       The frame currently shown on the terminal. Is ``None`` before the first frame is drawn.
+
+       .. versionadded:: 0.2
+
+    .. py:attribute:: back_buffer
+       :type: FrameBuffer
+
+       The frame being drawn. Only the cells that differ from :py:attr:`front_buffer` are written to the terminal.
+
+       .. versionadded:: 0.2
+
+    .. py:attribute:: encoder
+       :type: Encoder
+
+       The encoder of frames into terminal output, for the number of colours of the terminal.
+
+       .. versionadded:: 0.2
+
+    .. py:attribute:: fps_cap
+       :type: Optional[float]
+
+       The maximum number of frames per second, set by :py:meth:`start`. Is ``None`` if uncapped.
+
+       .. versionadded:: 0.2
 
-    def __init__(self):
+    .. py:attribute:: timestep
+       :type: Optional[float]
+
+       The fixed number of seconds simulated by each update, set by :py:meth:`start`.
+       Is ``None`` if there is one update every frame.
+
+       .. versionadded:: 0.2
+
+    .. py:attribute:: dt
+       :type: float
+
+       The number of seconds simulated by the current update.
+       This is :py:attr:`timestep` if it is set, otherwise the time since the previous frame.
+
+       .. versionadded:: 0.2
+
+    .. py:attribute:: executor
+       :type: Optional[ThreadPoolExecutor]
+
+       The thread pool that object methods are run on. Is ``None`` if they are run in the calling thread.
+
+       .. versionadded:: 0.2
+
+    .. py:attribute:: max_steps_per_frame
+       :type: int
+
+       The maximum number of updates run in one frame when :py:attr:`timestep` is set.
+       If the game falls further behind than this, the remaining time is dropped.
+
+       .. versionadded:: 0.2
+
+    .. py:attribute:: stream_margin
+       :type: int
+
+       How far around the screen objects of a scene loaded lazily with :py:meth:`Scene.load() <tegen.scene.Scene.load>`
+       are built, checked before every tick
+
+       .. versionadded:: 0.2
+
+    .. py:attribute:: headless
+       :type: bool
+
+       Whether frames are drawn without a terminal.
+
+       .. versionadded:: 0.2
+
+    .. py:attribute:: profiler
+       :type: Profiler
+
+       The profiler of the game, which records where the time of each frame is spent when enabled.
+
+       .. versionadded:: 0.2
+
+    .. py:attribute:: collisions
+       :type: CollisionWorld
+
+       The collidable sprites of the game. After every tick, :py:meth:`Object.on_collision() <tegen.objects.Object.on_collision>`
+       is called on the sprites that overlap.
+
+       .. versionadded:: 0.2"""
+
+    max_steps_per_frame = 5
+    coalesce_repeats = False
+    key_hold = 0.1
+    stream_margin = 32
+    _term: Optional[blessed.Terminal] = None
+
+    def __init__(self, workers: Optional[int]=None, headless: bool=False, size: Optional[Tuple[int, int]]=None):
+        if workers is not None and workers <= 0:
+            raise ValueError("'workers' must be positive")
+        self.headless = headless
         self.game_on = False
         self.loop: threading.Thread = None
         self.keyboard_listener: threading.Thread = None
         self.objects: Dict[tuple, Object] = {}
         self.screen = Screen(0, 0)
+        if headless: self.screen.width, self.screen.height = (80, 24) if size is None else size
         self.current_scene: Scene = None
-        self.speeds: List[float] = []
+        self.speeds: deque = deque(maxlen=100)
         self.current_text_input: TextInput = None
+        self.front_buffer: FrameBuffer = None
+        self.back_buffer: FrameBuffer = None
+        self._repaint = True
+        self.encoder = Encoder(None if headless else self.term)
+        self.fps_cap: Optional[float] = None
+        self.timestep: Optional[float] = None
+        self.dt: float = 0
+        self.executor: Optional[ThreadPoolExecutor] = None \
+            if workers is None else ThreadPoolExecutor(workers, initializer=_mark_worker)
+        self._async_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._tasks = set()
+        self._pending_keyboard = False
+        self.input_queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._key_times: Dict[str, float] = {}
+        self._input_time = 0.0
+        self._ignore_keys_until = 0.0
+        self._handlers: Dict[str, list] = {}
+        self._subscribers: Dict[str, Tuple[Object, ...]] = {}
+        self._handler_count = 0
+        self._render_list: List[Object] = []
+        self._prev_winch = None
+        self._winch = False
+        self._unwatch_pending = False
+        self._size_checked = 0
+        self.profiler = Profiler()
+        self.collisions = CollisionWorld()
+        self._preload: Optional[Tuple[Scene, _Staging, Future]] = None
+        self._switch = False
+        self._registry_lock = threading.RLock()
+        self._queue_lock = threading.Lock()
+        self._commands: deque = deque()
+        self._command_seq = 0
+        self._pending_ids: Dict[str, Tuple[Optional[Object], int]] = {}
+        self._pending_clear: Optional[int] = None
+        self._defer = 0
+        self._frame_waiting = False
 
-    def start(self, show_info: bool=True, info_wait: Union[int, float]=3):
+    @property
+    def term(self) -> blessed.Terminal:
+        """The terminal of the game, created when first used and shared by all games.
+
+        .. versionchanged:: 0.2
+           No longer created on import"""
+        if Game._term is None: Game._term = blessed.Terminal()
+        return Game._term
+
+    def start(self, show_info: bool=True, info_wait: Union[int, float]=3,
+              fps: Optional[float]=None, timestep: Optional[float]=None):
         """Starts the game.
 
         .. versionadded:: 0.0
 
+        .. versionchanged:: 0.2
+           Added ``fps`` and ``timestep``
+
         :param bool show_info: Whether to show tegen and terminal info before the game starts
         :param info_wait: The amount of time for tegen and terminal info to show
-        :type info_wait: int or float"""
-        term = self.term
-        print(term.height*"\n")
-        print(term.home + term.clear, end='')
-        if show_info:
-            from tegen import __version__
-            print(term.bold("tegen v"+__version__))
-            print("number of colours: "+str(term.number_of_colors))
-            print("terminal size (h,w): "+str((term.height, term.width)))
-            time.sleep(info_wait)
-        print(term.home + term.clear, end='')
+        :type info_wait: int or float
+        :param fps: The maximum number of frames per second, the game loop sleeps for the rest of each frame
+        :type fps: Optional[float]
+        :param timestep: If set, updates simulate this fixed number of seconds each,
+           and are run as many times per frame as needed to keep up with real time, up to :py:attr:`max_steps_per_frame`
+        :type timestep: Optional[float]
+        :raises ValueError: if ``fps`` or ``timestep`` is not positive"""
+        self._setup(fps, timestep)
+        if not self.headless:
+            self._watch_resize()
+            if show_info:
+                self._show_info()
+                time.sleep(info_wait)
+            print(self.term.home + self.term.clear, end='')
         self.game_on = True
         self.loop = threading.Thread(target=_loop, args=(self,))
         self.loop.start()
-        
+        if self._pending_keyboard:
+            self._pending_keyboard = False
+            self.add_keyboard_listener()
+
+    async def run_async(self, show_info: bool=True, info_wait: Union[int, float]=3,
+                        fps: Optional[float]=None, timestep: Optional[float]=None):
+        """Runs the game on the current asyncio event loop, until the game ends.
+        Object methods are run on the event loop, and may be coroutine functions (``async def``).
+        Coroutines of updates are awaited before the next phase of the update starts,
+        other coroutines, such as of :py:meth:`Object.on_init` or :py:meth:`Object.on_keyboard_press`, are run as tasks.
+
+        .. versionadded:: 0.2
+
+        **Example:**
+
+        .. code-block:: python
+
+           async def main():
+               game.load_scene(scene)
+               game.add_keyboard_listener()
+               await game.run_async()
+
+           asyncio.run(main())
+
+        :param bool show_info: Whether to show tegen and terminal info before the game starts
+        :param info_wait: The amount of time for tegen and terminal info to show
+        :type info_wait: int or float
+        :param fps: The maximum number of frames per second
+        :type fps: Optional[float]
+        :param timestep: If set, updates simulate this fixed number of seconds each, see :py:meth:`start`
+        :type timestep: Optional[float]
+        :raises ValueError: if ``fps`` or ``timestep`` is not positive"""
+        self._setup(fps, timestep)
+        self._async_loop = asyncio.get_running_loop()
+        if not self.headless: self._watch_resize()
+        try:
+            if not self.headless:
+                if show_info:
+                    self._show_info()
+                    await asyncio.sleep(info_wait)
+                print(self.term.home + self.term.clear, end='')
+            self.game_on = True
+            if self._pending_keyboard:
+                self._pending_keyboard = False
+                self.add_keyboard_listener()
+            await _loop_async(self)
+        finally:
+            self._async_loop = None
+            self._unwatch_resize()
+
+    def _setup(self, fps: Optional[float], timestep: Optional[float]):
+        """:meta private:"""
+        if fps is not None and fps <= 0:
+            raise ValueError("'fps' must be positive")
+        if timestep is not None and timestep <= 0:
+            raise ValueError("'timestep' must be positive")
+        self.fps_cap = fps
+        self.timestep = timestep
+        if self.headless: return
+        term = self.term
+        print(term.height*"\n")
+        print(term.home + term.clear, end='')
+
+    def _watch_resize(self):
+        """:meta private:"""
+        if not hasattr(signal, 'SIGWINCH') or threading.current_thread() is not threading.main_thread(): return
+        def on_resize(*args):
+            if self._unwatch_pending:
+                # the game ended on another thread, signal handlers can only be set on the main thread
+                self._unwatch_resize()
+                if callable(self._prev_winch): self._prev_winch(*args)
+                return
+            self.screen.size_stale = True
+        self._unwatch_pending = False
+        self._prev_winch = signal.signal(signal.SIGWINCH, on_resize)
+        self._winch = True
+
+    def _unwatch_resize(self):
+        """:meta private:"""
+        if not self._winch: return
+        if threading.current_thread() is not threading.main_thread():
+            self._unwatch_pending = True
+            return
+        signal.signal(signal.SIGWINCH, self._prev_winch or signal.SIG_DFL)
+        self._winch = False
+        self._unwatch_pending = False
+
+    def _show_info(self):
+        """:meta private:"""
+        term = self.term
+        from tegen import __version__
+        print(term.bold("tegen v"+__version__))
+        print("number of colours: "+str(term.number_of_colors))
+        print("terminal size (h,w): "+str((term.height, term.width)))
+
+    def call(self, obj: Object, method: str, *args):
+        """Runs a method of an object. If the method is a coroutine function, the coroutine is run as a task
+        when the game is running with :py:meth:`run_async`, otherwise it is run to completion.
+
+        .. versionadded:: 0.2
+
+        :param Object obj: The object
+        :param str method: The name of the method, eg ``on_init``"""
+        result = getattr(obj, method)(self, *args)
+        if inspect.isawaitable(result): self._schedule(result)
+
+    def _profiled_call(self, obj: Object, method: str, *args):
+        """:meta private:"""
+        start = time.perf_counter()
+        try:
+            self.call(obj, method, *args)
+        finally:
+            self.profiler.record_object(obj.id, time.perf_counter()-start)
+
+    def _schedule(self, awaitable):
+        """:meta private:"""
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is not None:
+            task = asyncio.ensure_future(awaitable)
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        elif self._async_loop is not None:
+            asyncio.run_coroutine_threadsafe(_await(awaitable), self._async_loop)
+        else:
+            asyncio.run(_await(awaitable))
+
     def end(self):
         """Ends the game.
 
-        .. versionadded:: 0.0"""
-        term = self.term
-        for id_, obj in self.objects.items():
-            threading.Thread(target=obj.on_end, args=(self,)).start()
+        .. versionadded:: 0.0
+
+        .. versionchanged:: 0.2
+           The game loop clears the screen after it stops, instead of this method,
+           so no frame is drawn over it when the game is ended during a frame"""
+        self.run_all('on_end')
         self.game_on = False
-        print(term.home + term.clear + term.bright_yellow("Stopping..."), end='')
-        time.sleep(0.5)
-        print(term.home + term.clear, end='')
+        self._unwatch_resize()
 
     def load_scene(self, scene: Scene, clear_objects: bool=True):
         """Loads a scene to the game.
+        Objects of a scene loaded lazily are added when they come within :py:attr:`stream_margin` of the screen.
 
         .. versionadded:: 0.0
 
+        .. versionchanged:: 0.2
+           If called during a frame, the scene is loaded when the frame ends
+
         :param Scene scene: The scene to load
         :param bool clear_objects: Whether to clear all objects in the previous scene before loading the new scene"""
-        for id_, obj in self.objects.items():
-            threading.Thread(target=obj.on_end, args=(self,)).start()
+        _command(self, ('scene', scene, clear_objects))
+
+    def _load_scene(self, scene: Scene, clear_objects: bool):
+        """:meta private:"""
+        self.run_all('on_end')
         self.current_scene = scene
-        if clear_objects: self.objects.clear()
-        self.objects.update(scene.objects)
-        for id_, obj in self.objects.items():
-            threading.Thread(target=obj.on_init, args=(self,)).start()
+        if clear_objects:
+            for id_ in list(self.objects.keys()):
+                self._del_object(id_)
+        for id_, obj in scene.objects.items():
+            self._set_object(id_, obj)
+        for id_, obj in self._materialise().items():
+            self._set_object(id_, obj)
+        self.run_all('on_init')
+
+    def _materialise(self) -> Dict[str, Object]:
+        """:meta private:"""
+        scene = self.current_scene
+        if scene is None or scene.pending() == 0: return {}
+        lx, rx, ty, by = self.screen.edges()
+        m = self.stream_margin
+        return scene.materialise(lx-m, rx+m, ty-m, by+m)
+
+    def _set_object(self, id_: str, obj: Object):
+        """:meta private:"""
+        _register(self, id_, obj)
+
+    def _del_object(self, id_: str):
+        """:meta private:"""
+        _unregister(self, id_)
+
+    def preload_scene(self, scene: Scene) -> Future:
+        """Prepares a scene on another thread while the game keeps running, to be swapped in by :py:meth:`switch_scene`.
+        The objects of the scene, and those of a scene loaded lazily within :py:attr:`stream_margin` of the screen,
+        are registered and have their edges and layouts cached, before they are added to the game.
+        Their ``on_init`` is run when they are swapped in, so that it sees the new scene.
+        Preloading another scene replaces the scene being preloaded.
+
+        .. versionadded:: 0.2
+
+        :param Scene scene: The scene to preload
+        :returns: A future that is done when the scene is ready
+        :rtype: concurrent.futures.Future"""
+        future = Future()
+        staging = _Staging(self.collisions.cell_size)
+        lx, rx, ty, by = self.screen.edges()
+        m = self.stream_margin
+
+        def build():
+            try:
+                objects = dict(scene.objects)
+                objects.update(scene.materialise(lx-m, rx+m, ty-m, by+m))
+                for id_, obj in objects.items():
+                    _register(staging, id_, obj)
+                for obj in staging.objects.values():
+                    _warm(obj, (lx, rx, ty, by))
+                future.set_result(scene)
+            except BaseException as e:
+                future.set_exception(e)
+        self._preload = (scene, staging, future)
+        threading.Thread(target=build, daemon=True).start()
+        return future
+
+    def switch_scene(self):
+        """Swaps in the scene preloaded by :py:meth:`preload_scene`, at the start of the first frame after it is ready.
+        ``on_end`` is run on the objects of the current scene, then all objects are replaced at once,
+        so no frame is drawn with some of the objects of each scene, and ``on_init`` is run on the new objects.
+
+        .. versionadded:: 0.2
+
+        :raises RuntimeError: if no scene is being preloaded"""
+        if self._preload is None:
+            raise RuntimeError("No scene is being preloaded, call preload_scene() first")
+        self._switch = True
+
+    def run_all(self, method: str, *args):
+        """Runs a method on all objects, on :py:attr:`executor` if it is set, and waits for all of them to finish.
+
+        .. versionadded:: 0.2
+
+        :param str method: The name of the method, eg ``update``
+        :raises Exception: the first exception raised by any of the methods"""
+        call = self._profiled_call if self.profiler.enabled else self.call
+        if getattr(_worker, 'active', False):
+            # the thread that submitted this worker's method is already deferring changes to the objects
+            for obj in self.objects.values():
+                call(obj, method, *args)
+            return
+        with _deferring(self):
+            if self.executor is None or self._async_loop is not None:
+                for obj in self.objects.values():
+                    call(obj, method, *args)
+                return
+            futures = [self.executor.submit(call, obj, method, *args) for obj in self.objects.values()]
+            for future in futures:
+                future.result()
 
     def save_scene(self) -> Scene:
         """Saves the current game as a scene.
@@ -140,26 +575,72 @@ class Game:
         scene = Scene()
         for k, v in self.objects.items():
             scene.add_object(v, k, v.x, v.y)
+        current = self.current_scene
+        if current is not None and current.pending() != 0:
+            scene._file = current._file # noqa
+            scene._pending = dict(current._pending) # noqa
+            scene._cells = {k: list(v) for k, v in current._cells.items()} # noqa
         return scene
 
-    def call_event(self, event: str, *args, **kwargs):
+    def call_event(self, event: str, *args, **kwargs) -> bool:
         """Calls an event, running `on_<event name>` in all :py:class:`Object` s, if present.
         
         .. versionadded:: 0.0
+
+        .. versionchanged:: 0.2
+           Only objects that define `on_<event name>` are run, in order of :py:attr:`Object.event_priority`.
+           A handler may raise :py:class:`StopPropagation` to stop the event from reaching the remaining objects.
+           Now returns whether the event was stopped
         
-        :param str event: The name of the event to call"""
-        def empty():
-            pass
+        :param str event: The name of the event to call
+        :returns: Whether a handler stopped the event
+        :rtype: bool"""
+        if self.profiler.enabled:
+            start = time.perf_counter()
+            try:
+                return self._dispatch(event, *args, **kwargs)
+            finally:
+                self.profiler.record_event(event, time.perf_counter()-start)
+        return self._dispatch(event, *args, **kwargs)
+
+    def _dispatch(self, event: str, *args, **kwargs) -> bool:
+        """:meta private:"""
+        for obj in self._subscribers.get(event, ()):
+            try:
+                result = getattr(obj, 'on_'+event)(self, *args, **kwargs)
+            except StopPropagation:
+                return True
+            if inspect.isawaitable(result): self._schedule(result)
+        return False
+
+    def draw_order(self) -> List[Object]:
+        """Gets the objects in the order that they are drawn, from back to front.
+        Objects are sorted by :py:attr:`Object.z`, then by the order that they were added.
+
+        .. versionadded:: 0.2
+
+        :returns: A new list, which can be changed without changing the game
+        :rtype: List[Object]"""
+        # the registry stays in the order objects were added, so objects with the same z keep it when z changes
+        return sorted(self._render_list, key=_z)
 
-        items = list(self.objects.items())[:]
-        for id_, obj in items:
-            getattr(obj, 'on_'+event, empty)(self, *args, **kwargs) # noqa
+    def subscribers(self, event: str) -> Tuple[Object, ...]:
+        """Gets the objects that handle an event, in the order that they are run.
+
+        .. versionadded:: 0.2
+
+        :param str event: The name of the event
+        :rtype: Tuple[Object, ...]"""
+        return self._subscribers.get(event, ())
 
     def add_object(self, obj: Object, id_: str, x: float, y: float, override: bool = False):
         """Adds an :py:class:`Object` to the game.
 
         .. versionadded:: 0.0
 
+        .. versionchanged:: 0.2
+           If called during a frame, the object is added, and its ``on_init`` run, when the frame ends
+
         :param Object obj: The object to add
         :param str id_: The ID to give to the object
         :param float x: The global x coordinate of the anchor (local x=0)
@@ -169,27 +650,27 @@ class Game:
         :raises KeyError: if an object with the same ID exists and ``override`` is False"""
         if isinstance(obj, Screen):
             raise ValueError("Object added cannot be a screen, access the screen via `Game.screen`")
-        if id_ in self.objects.keys() and not override:
+        if self.has_object(id_) and not override:
             raise KeyError(f"Object '{id_}' already exists")
         obj.id = id_
         obj.x = x
         obj.y = y
-        self.objects[id_] = obj
-        threading.Thread(target=obj.on_init, args=(self,)).start()
+        _command(self, ('add', id_, obj))
 
     def remove_object_by_id(self, id_: str, nonexist_error: bool = False):
         """Removes an :py:class:`Object` from the game by its ID.
 
         .. versionadded:: 0.0
 
+        .. versionchanged:: 0.2
+           If called during a frame, the object is removed, and its ``on_end`` run, when the frame ends
+
         :param str id_: The ID of the object to remove
         :param bool nonexist_error: Whether to raise an error if an object does not exist in the game."""
-        try:
-            # todo executor
-            self.objects[id_].on_end(self)
-            del self.objects[id_]
-        except KeyError as e:
-            if nonexist_error: raise e
+        if not self.has_object(id_):
+            if nonexist_error: raise KeyError(id_)
+            return
+        _command(self, ('remove', id_))
 
     def remove_object_by_class(self, cls: type) -> int:
         """Removes :py:class:`Object` s from the game by their class type.
@@ -199,32 +680,161 @@ class Game:
         .. versionchanged:: 0.1
            Now returns the number of objects removed
 
+        .. versionchanged:: 0.2
+           If called during a frame, the objects are removed when the frame ends
+
         :param type cls: The class, should be a subclass of :py:class:`Object`
         :raises TypeError: if the class is not a subclass of :py:class:`Object`
         :returns: The number of objects removed
         :rtype: int"""
         if not issubclass(cls, Object):
             raise TypeError("Class is not subclass of Object")
-        count = 0
-        for id_, obj in self.objects.items():
-            if isinstance(obj, cls):
-                count += 1
-                # todo executor
-                self.objects[id_].on_end(self)
-                del self.objects[id_]
-        return count
+        ids = [id_ for id_, obj in _current_objects(self).items() if isinstance(obj, cls)]
+        for id_ in ids:
+            _command(self, ('remove', id_))
+        return len(ids)
+
+    def has_object(self, id_: str) -> bool:
+        """Returns whether an object with an ID is in the game,
+        including objects added or removed during the current frame that are not in :py:attr:`objects` yet.
+
+        .. versionadded:: 0.2
+
+        :param str id_: The ID of the object
+        :rtype: bool"""
+        return self.get_object(id_) is not None
+
+    def get_object(self, id_: str, default: Optional[Object]=None) -> Optional[Object]:
+        """Gets an object by its ID,
+        including objects added or removed during the current frame that are not in :py:attr:`objects` yet.
+
+        .. versionadded:: 0.2
+
+        :param str id_: The ID of the object
+        :param default: The value to return if there is no object with the ID
+        :type default: Optional[Object]
+        :rtype: Optional[Object]"""
+        with self._queue_lock:
+            if id_ in self._pending_ids:
+                obj = self._pending_ids[id_][0]
+            else:
+                obj = None if self._pending_clear is not None else self.objects.get(id_)
+        return default if obj is None else obj
 
     def add_keyboard_listener(self):
         """Adds a keyboard listener, to fire events when a key is pressed.
 
-        .. versionadded:: 0.0"""
-        self.keyboard_listener = threading.Thread(target=_keyboard, args=(self,))
-        self.keyboard_listener.start()
+        .. versionadded:: 0.0
+
+        .. versionchanged:: 0.2
+           When running with :py:meth:`run_async`, keys are read in a task on the event loop.
+           If the game has not started, the listener is added when it starts. Does nothing if the game is headless.
+           Keys are put in :py:attr:`input_queue` and handled at the start of the next frame"""
+        if self.headless:
+            return
+        if not self.game_on:
+            self._pending_keyboard = True
+        elif self._async_loop is not None:
+            self.keyboard_listener = asyncio.ensure_future(_keyboard_async(self))
+        else:
+            self.keyboard_listener = threading.Thread(target=_keyboard, args=(self,))
+            self.keyboard_listener.start()
+
+    def step(self, dt: Optional[float]=None):
+        """Runs one frame of the game: updates all objects once, then draws the frame.
+        Can be used instead of :py:meth:`start` to run the game frame by frame, eg when :py:attr:`headless`.
+
+        .. versionadded:: 0.2
+
+        :param dt: The number of seconds that the update simulates, defaults to :py:attr:`timestep`, or ``0`` if it is not set
+        :type dt: Optional[float]"""
+        loop_start = time.perf_counter()
+        with _deferring(self):
+            _swap(self)
+            _drain_input(self)
+            self.dt = (self.timestep or 0) if dt is None else dt
+            _update(self)
+            _draw(self)
+        _record_speed(self, loop_start)
+
+    def screenshot(self, ansi: bool=False) -> str:
+        """Gets the last frame drawn as a string.
+
+        .. versionadded:: 0.2
+
+        :param bool ansi: Whether to include colours as ANSI escape sequences, otherwise only the characters are included
+        :returns: The frame, with rows separated by newlines if ``ansi`` is ``False``. Empty if no frame has been drawn
+        :rtype: str"""
+        buffer = self.front_buffer
+        if buffer is None: return ""
+        if ansi: return self.encoder.diff(None, buffer)
+        chars = buffer.pixels.char
+        rows = []
+        for row in chars.tolist():
+            text = []
+            lead = False
+            for c in row:
+                # a continuation cell is only covered if the character before it is wide
+                if c == render.CONTINUATION and lead:
+                    lead = False
+                    continue
+                text.append(" " if c in (0, render.CONTINUATION) else chr(c))
+                lead = c >= 0x1100 and render._wide(c) # noqa
+            rows.append("".join(text))
+        return "\n".join(rows)
+
+    def repaint(self):
+        """Repaints the whole screen on the next frame, instead of only the cells that changed.
+
+        .. versionadded:: 0.2"""
+        self._repaint = True
+
+    def query_rect(self, lx: int, rx: int, ty: int, by: int) -> List[Sprite]:
+        """Returns the collidable sprites that have pixels in a rectangle,
+        where they were when collisions were last checked.
+
+        .. versionadded:: 0.2
+
+        :param int lx: The global x coordinate of the leftmost column of the rectangle
+        :param int rx: The global x coordinate of the rightmost column of the rectangle
+        :param int ty: The global y coordinate of the topmost row of the rectangle
+        :param int by: The global y coordinate of the bottommost row of the rectangle
+        :rtype: List[Sprite]"""
+        return self.collisions.query_rect(lx, rx, ty, by)
+
+    def query_point(self, x: int, y: int) -> List[Sprite]:
+        """Returns the collidable sprites that have a pixel at a point,
+        where they were when collisions were last checked.
+
+        .. versionadded:: 0.2
+
+        :param int x: The global x coordinate
+        :param int y: The global y coordinate
+        :rtype: List[Sprite]"""
+        return self.collisions.query_point(x, y)
+
+    def is_pressed(self, key: str) -> bool:
+        """Returns whether a key was read within the last :py:attr:`key_hold` seconds, as of the start of the frame.
+
+        .. versionadded:: 0.2
+
+        :param str key: The key, either the character or the name, eg ``a`` or ``KEY_LEFT``
+        :rtype: bool"""
+        t = self._key_times.get(key)
+        return t is not None and self._input_time-t <= self.key_hold
 
     def wait_until_key_released(self):
         """Waits until all keys are released.
         
-        .. versionadded:: 0.1"""
+        .. versionadded:: 0.1
+
+        .. versionchanged:: 0.2
+           No longer waits if the keyboard listener is running. Instead, keys read from now on are dropped
+           until no key has been read for 0.1 seconds, so that keys held down are not handled"""
+        if self.headless: return
+        if self.keyboard_listener is not None:
+            self._ignore_keys_until = time.perf_counter()+0.1
+            return
         term = self.term
         with term.cbreak():
             while term.inkey(timeout=0.1) != "":
@@ -254,32 +864,19 @@ class Game:
         """Get the pixel at a certain global coordinate.
         
         .. versionadded:: 0.0
+
+        .. versionchanged:: 0.2
+           Pixels on the screen are read from the last frame drawn, in :py:attr:`front_buffer`
         
         :param int x: The global x coordinate of the pixel.
         :param int y: The global y coordinate of the pixel.
         :returns: A tuple of ``(back colour, fore colour, character)``
         :rtype: Tuple[Optional[Tuple[int, int, int]], Optional[Tuple[int, int, int]], Optional[str]]"""
-        back, fore, char = (None,)*3
-        values = list(self.objects.values())[:]
-        for obj in values:
-            lx, rx, ty, by = obj.edges()
-            if x < lx or x > rx or y < ty or y > by: continue
-            if issubclass(type(obj), Sprite):
-                obj: Sprite # pacify linter
-                pixel_info = obj.pixels[x-obj.x, y-obj.y]
-                if 'back' in pixel_info.keys() and pixel_info['back'] is not None: back = pixel_info['back']
-                if 'fore' in pixel_info.keys() and ['fore'] is not None: fore = pixel_info['fore']
-                if 'char' in pixel_info.keys() and ['char'] is not None: char = pixel_info['char']
-            elif issubclass(type(obj), Text):
-                obj: Text # pacify linter
-                pos = obj.get_char_positions()
-                if (x-obj.x, y-obj.y) not in pos.keys(): continue
-                if obj.back is not None: back = pixel._parse_colours(obj.back) # noqa
-                if obj.fore is not None: fore = pixel._parse_colours(obj.fore) # noqa
-                char = pos[x-obj.x, y-obj.y]
-            else:
-                continue
-        return back, fore, char
+        buffer = self.front_buffer
+        if buffer is None or not (0 <= x-buffer.x < buffer.width and 0 <= y-buffer.y < buffer.height):
+            buffer = FrameBuffer(1, 1)
+            render.compose(buffer, self.draw_order(), x, y)
+        return buffer[x-buffer.x, y-buffer.y]
 
     def handle_error(self):
         """Handles any error properly when the game is running.
@@ -296,8 +893,12 @@ class Game:
            except Exception as e:
                game.handle_error()
         """
-        term = self.term
         self.game_on = False
+        self._unwatch_resize()
+        if self.headless:
+            traceback.print_exc()
+            return
+        term = self.term
         print(term.home + term.clear_eos + term.bright_red("An error has occured and the game will quit shortly.\n") + term.red(traceback.format_exc()))
         time.sleep(0.5)
         print(term.bright_red("Press any key to continue..."))
@@ -305,47 +906,419 @@ class Game:
             term.inkey(timeout=15)
         
 
-def _loop(game: Game):
+_worker = threading.local()
+
+@functools.lru_cache(maxsize=None)
+def _class_events(cls: type) -> Tuple[str, ...]:
+    """:meta private:"""
+    events = []
+    for name in dir(cls):
+        if not name.startswith('on_'): continue
+        attr = getattr(cls, name)
+        if callable(attr) and attr is not getattr(Object, name, None): events.append(name[3:])
+    return tuple(events)
+
+def _z(obj: Object):
+    """:meta private:"""
+    return obj.z
+
+def _handled_events(obj: Object) -> Tuple[str, ...]:
+    """:meta private:"""
+    events = _class_events(type(obj))
+    own = [name[3:] for name, attr in vars(obj).items() if name.startswith('on_') and callable(attr)]
+    if own: events = tuple(set(events).union(own))
+    return events
+
+def _mark_worker():
+    """:meta private:"""
+    _worker.active = True
+
+class _Staging:
+    """The objects of a scene being preloaded, registered in the same way as in a game.
+
+    :meta private:"""
+
+    def __init__(self, cell_size: int):
+        self.objects: Dict[str, Object] = {}
+        self._handlers: Dict[str, list] = {}
+        self._subscribers: Dict[str, Tuple[Object, ...]] = {}
+        self._handler_count = 0
+        self._render_list: List[Object] = []
+        self.collisions = CollisionWorld(cell_size)
+
+def _register(registry: Union[Game, _Staging], id_: str, obj: Object):
+    """:meta private:"""
+    if id_ in registry.objects: _unregister(registry, id_)
+    registry.objects[id_] = obj
+    registry._render_list.append(obj)
+    if isinstance(obj, Sprite) and obj.collidable: registry.collisions.add(obj)
+    for event in _handled_events(obj):
+        entries = registry._handlers.setdefault(event, [])
+        bisect.insort(entries, (-obj.event_priority, registry._handler_count, obj))
+        registry._subscribers[event] = tuple(e[2] for e in entries)
+    registry._handler_count += 1
+
+def _unregister(registry: Union[Game, _Staging], id_: str):
+    """:meta private:"""
+    obj = registry.objects.pop(id_)
+    registry._render_list.remove(obj)
+    registry.collisions.remove(obj)
+    for event in _handled_events(obj):
+        entries = [e for e in registry._handlers.get(event, []) if e[2] is not obj]
+        registry._handlers[event] = entries
+        registry._subscribers[event] = tuple(e[2] for e in entries)
+
+def _warm(obj: Object, edges: Tuple[int, int, int, int]):
+    """:meta private:"""
+    if isinstance(obj, Sprite):
+        obj.local_edges()
+        if obj.collidable: obj.occupancy()
+    elif isinstance(obj, Text):
+        obj.get_char_positions()
+    elif isinstance(obj, TileMap):
+        for cx, cy in obj.visible_chunks(*edges):
+            obj.chunk_pixels(cx, cy)
+
+@contextlib.contextmanager
+def _deferring(game: Game):
+    """Queues changes to the objects of the game until the outermost block ends, then applies them.
+
+    :meta private:"""
+    lock = game._registry_lock # noqa
+    if not lock.acquire(blocking=False):
+        game._frame_waiting = True # noqa
+        lock.acquire()
+    try:
+        game._frame_waiting = False # noqa
+        game._defer += 1 # noqa
+        try:
+            yield
+        finally:
+            game._defer -= 1 # noqa
+            # changes made while applying are applied at the next frame boundary, so other threads cannot delay the frame
+            if game._defer == 0 and len(game._commands) != 0: # noqa
+                _apply_commands(game, limit=len(game._commands)) # noqa
+    finally:
+        lock.release()
+
+def _command(game: Game, command: tuple):
+    """Queues a change to the objects of the game, and applies it now if no frame is running.
+
+    :meta private:"""
+    with game._queue_lock: # noqa
+        game._command_seq += 1 # noqa
+        seq = game._command_seq # noqa
+        game._commands.append((seq, command)) # noqa
+        kind = command[0]
+        if kind == 'add':
+            game._pending_ids[command[1]] = (command[2], seq) # noqa
+        elif kind == 'remove':
+            game._pending_ids[command[1]] = (None, seq) # noqa
+        else:
+            if command[2]:
+                game._pending_ids.clear() # noqa
+                game._pending_clear = seq # noqa
+            for id_, obj in command[1].objects.items():
+                game._pending_ids[id_] = (obj, seq) # noqa
+    # a frame, or another thread applying changes, holds the lock and applies this change when it finishes
+    if not game._registry_lock.acquire(blocking=False): return # noqa
+    try:
+        if game._defer == 0: _apply_commands(game) # noqa
+    finally:
+        game._registry_lock.release() # noqa
+
+def _apply_commands(game: Game, limit: Optional[int]=None):
+    """Applies the queued changes to the objects of the game, in the order they were made.
+    The changes are made to a new dict, so that a reference to the old one can still be iterated.
+    Stops after ``limit`` changes if it is set, or when a frame is waiting to start.
+
+    :meta private:"""
+    game._defer += 1 # noqa
+    copied = False
+    try:
+        while limit is None or limit > 0:
+            if limit is None and game._frame_waiting: return # noqa
+            with game._queue_lock: # noqa
+                if len(game._commands) == 0: return # noqa
+                seq, command = game._commands.popleft() # noqa
+            if limit is not None: limit -= 1
+            if not copied:
+                game.objects = dict(game.objects)
+                copied = True
+            try:
+                _apply(game, command)
+            finally:
+                _settle(game, seq, command)
+    finally:
+        game._defer -= 1 # noqa
+
+def _apply(game: Game, command: tuple):
+    """:meta private:"""
+    kind = command[0]
+    if kind == 'add':
+        game._set_object(command[1], command[2]) # noqa
+        game.call(command[2], 'on_init')
+    elif kind == 'remove':
+        obj = game.objects.get(command[1])
+        if obj is None: return
+        game.call(obj, 'on_end')
+        game._del_object(command[1]) # noqa
+    else:
+        game._load_scene(command[1], command[2]) # noqa
+
+def _settle(game: Game, seq: int, command: tuple):
+    """Forgets the IDs of an applied change, unless a later change to them is queued.
+
+    :meta private:"""
+    with game._queue_lock: # noqa
+        pending = game._pending_ids # noqa
+        ids = command[1].objects.keys() if command[0] == 'scene' else (command[1],)
+        for id_ in ids:
+            entry = pending.get(id_)
+            if entry is not None and entry[1] == seq: del pending[id_]
+        if game._pending_clear == seq: game._pending_clear = None # noqa
+
+def _current_objects(game: Game) -> Dict[str, Object]:
+    """Gets the objects of the game, including the changes that have not been applied yet.
+
+    :meta private:"""
+    with game._queue_lock: # noqa
+        objects = {} if game._pending_clear is not None else dict(game.objects) # noqa
+        for id_, (obj, _) in game._pending_ids.items(): # noqa
+            if obj is None: objects.pop(id_, None)
+            else: objects[id_] = obj
+    return objects
+
+def _swap(game: Game):
+    """:meta private:"""
+    if not game._switch: return # noqa
+    scene, staging, future = game._preload # noqa
+    if not future.done(): return
+    game._switch, game._preload = False, None
+    future.result()
+    game.run_all('on_end')
+    with game._queue_lock: # noqa
+        # changes made by on_end were to the objects being replaced
+        game._commands.clear() # noqa
+        game._pending_ids.clear() # noqa
+        game._pending_clear = None # noqa
+    game.objects = staging.objects
+    game._handlers, game._subscribers = staging._handlers, staging._subscribers
+    game._handler_count = staging._handler_count
+    game._render_list = staging._render_list
+    game.collisions = staging.collisions
+    game.current_scene = scene
+    game.run_all('on_init')
+
+def _drain_input(game: Game):
+    """:meta private:"""
+    game._input_time = time.perf_counter() # noqa
+    keys = []
+    while True:
+        try:
+            keys.append(game.input_queue.get_nowait())
+        except queue.Empty:
+            break
+    prev = None
+    running = game.game_on
+    for key, t in keys:
+        if t <= game._ignore_keys_until: # noqa
+            # a key repeated while held, keep ignoring until there is a gap
+            game._ignore_keys_until = t+0.1 # noqa
+            continue
+        game._key_times[str(key)] = t # noqa
+        name = getattr(key, 'name', None)
+        if name: game._key_times[name] = t # noqa
+        if game.coalesce_repeats and prev is not None and key == prev and name == getattr(prev, 'name', None):
+            continue
+        prev = key
+        if running and not game.game_on: break
+        if game.current_text_input is None:
+            game.call_event("keyboard_press", key)
+        else:
+            game.call(game.current_text_input, 'on_keyboard_press', key)
+
+def _stream(game: Game):
+    """:meta private:"""
+    for id_, obj in game._materialise().items(): # noqa
+        _command(game, ('add', id_, obj))
+
+def _update(game: Game):
+    """:meta private:"""
+    _stream(game)
+    profiler = game.profiler
+    for method in ('pre_update', 'update', 'post_update'):
+        if not profiler.enabled:
+            game.run_all(method)
+            continue
+        start = time.perf_counter()
+        game.run_all(method)
+        profiler.record(method, time.perf_counter()-start)
+    _collide(game)
+
+def _collide(game: Game):
+    """:meta private:"""
+    start = time.perf_counter()
+    game.collisions.sync()
+    # without handlers, the world is only kept in sync for queries
+    pairs = game.collisions.pairs() if game._subscribers.get('collision') else () # noqa
+    for a, b in pairs:
+        if 'collision' in _handled_events(a): game.call(a, 'on_collision', b)
+        if 'collision' in _handled_events(b): game.call(b, 'on_collision', a)
+    if game.profiler.enabled: game.profiler.record('collision', time.perf_counter()-start)
+
+async def _update_async(game: Game):
+    """:meta private:"""
+    _stream(game)
+    profiler = game.profiler
+    for method in ('pre_update', 'update', 'post_update'):
+        start = time.perf_counter()
+        results = []
+        for obj in game.objects.values():
+            if not profiler.enabled:
+                results.append(getattr(obj, method)(game))
+                continue
+            obj_start = time.perf_counter()
+            results.append(getattr(obj, method)(game))
+            profiler.record_object(obj.id, time.perf_counter()-obj_start)
+        awaitables = [r for r in results if inspect.isawaitable(r)]
+        if awaitables: await asyncio.gather(*awaitables)
+        if profiler.enabled: profiler.record(method, time.perf_counter()-start)
+    _collide(game)
+
+def _update_count(game: Game, elapsed: float, lag: float) -> Tuple[int, float]:
+    """Sets ``game.dt`` and works out how many updates to run this frame.
+
+    :meta private:"""
+    if game.timestep is None:
+        game.dt = elapsed
+        return 1, 0
+    game.dt = game.timestep
+    lag += elapsed
+    steps = min(int(lag // game.timestep), game.max_steps_per_frame)
+    lag -= steps*game.timestep
+    if lag >= game.timestep: lag = 0
+    return steps, lag
+
+def _draw(game: Game):
+    """:meta private:"""
+    now = time.perf_counter()
+    if not game.headless and (game.screen.size_stale or not game._winch or now-game._size_checked > 1): # noqa
+        game._size_checked = now
+        if game.screen.refresh_size(): game.repaint()
+    lx, rx, ty, by = game.screen.edges()
+    width, height = rx-lx+1, by-ty+1
+    buffer = game.back_buffer
+    if buffer is None or buffer.size() != (width, height):
+        buffer = FrameBuffer(width, height)
+    profiler = game.profiler
+    start = time.perf_counter()
+    render.compose(buffer, game.draw_order(), lx, ty)
+    composed = time.perf_counter()
+    if profiler.enabled: profiler.record('compose', composed-start)
+    if game.headless:
+        game.back_buffer, game.front_buffer = game.front_buffer, buffer
+        return
+    front = None if game._repaint else game.front_buffer # noqa
+    game._repaint = False
+    out = game.encoder.diff(front, buffer)
+    game.back_buffer, game.front_buffer = game.front_buffer, buffer
+    encoded = time.perf_counter()
+    if out: print(out, end="", flush=True)
+    if profiler.enabled:
+        profiler.record('encode', encoded-composed)
+        profiler.record('write', time.perf_counter()-encoded)
+
+def _frame_wait(game: Game, loop_start: float) -> float:
+    """:meta private:"""
+    if game.fps_cap is None: return 0
+    return max(0, 1/game.fps_cap-(time.perf_counter()-loop_start))
+
+def _record_speed(game: Game, loop_start: float):
+    """:meta private:"""
+    game.speeds.append(1000*(time.perf_counter()-loop_start))
+    game.profiler.end_frame()
+
+def _show_stopping(game: Game):
     """:meta private:"""
     term = game.term
+    print(term.home + term.clear + term.bright_yellow("Stopping..."), end='', flush=True)
+
+def _loop(game: Game):
+    """:meta private:"""
     try:
+        prev_start = time.perf_counter()
+        lag = 0
         while game.game_on:
-            loop_start = time.time()
-            for obj in game.objects.values():
-                threading.Thread(target=obj.pre_update, args=(game,)).start()
-            for obj in game.objects.values():
-                threading.Thread(target=obj.update, args=(game,)).start()
-            for obj in game.objects.values():
-                threading.Thread(target=obj.post_update, args=(game,)).start()
-
-            out = ""
-            lx, rx, ty, by = game.screen.edges()
-            for y in range(ty, by+1):
-                for x in range(lx, rx+1):
-                    back, fore, char = game.get_displayed_pixel(x, y)
-                    back_style = (lambda o: o) if back is None else term.on_color_rgb(*back)
-                    fore_style = (lambda o: o) if fore is None else term.color_rgb(*fore)
-                    char = " " if char is None else char
-                    out += back_style(fore_style(char))
-            print(term.home + out + term.clear_eos, end="", flush=True)
-
-            #print(term.home + str(game.fps()) + term.clear_eol, flush=True)
-            game.speeds.append(1000*(time.time()-loop_start))
-            if len(game.speeds) > 100: game.speeds.pop(0)
+            loop_start = time.perf_counter()
+            with _deferring(game):
+                _swap(game)
+                _drain_input(game)
+                steps, lag = _update_count(game, loop_start-prev_start, lag)
+                prev_start = loop_start
+                for _ in range(steps):
+                    if not game.game_on: break
+                    _update(game)
+                if game.game_on: _draw(game)
+            if not game.game_on: break
+            time.sleep(_frame_wait(game, loop_start))
+            _record_speed(game, loop_start)
+        if game.headless: return
+        _show_stopping(game)
+        time.sleep(0.5)
+        print(game.term.home + game.term.clear, end='', flush=True)
     except Exception:
         game.handle_error()
 
+async def _loop_async(game: Game):
+    """:meta private:"""
+    try:
+        prev_start = time.perf_counter()
+        lag = 0
+        while game.game_on:
+            loop_start = time.perf_counter()
+            with _deferring(game):
+                _swap(game)
+                _drain_input(game)
+                steps, lag = _update_count(game, loop_start-prev_start, lag)
+                prev_start = loop_start
+                for _ in range(steps):
+                    if not game.game_on: break
+                    await _update_async(game)
+                if game.game_on: _draw(game)
+            if not game.game_on: break
+            await asyncio.sleep(_frame_wait(game, loop_start))
+            _record_speed(game, loop_start)
+        if game.headless: return
+        _show_stopping(game)
+        await asyncio.sleep(0.5)
+        print(game.term.home + game.term.clear, end='', flush=True)
+    except Exception:
+        game.handle_error()
+
+async def _await(awaitable):
+    """:meta private:"""
+    return await awaitable
+
 def _keyboard(game: Game):
     """:meta private:"""
     term = game.term
     try:
-        while game.game_on:
-            with term.cbreak():
-                key = term.inkey(timeout=1)
-                if key:
-                    if game.current_text_input is None:
-                        game.call_event("keyboard_press", key)
-                    else:
-                        threading.Thread(target=game.current_text_input.on_keyboard_press, args=(game, key)).start()
+        with term.cbreak():
+            while game.game_on:
+                key = term.inkey(timeout=0.1)
+                if key: game.input_queue.put((key, time.perf_counter()))
+    except Exception:
+        game.handle_error()
+
+async def _keyboard_async(game: Game):
+    """:meta private:"""
+    term = game.term
+    loop = asyncio.get_running_loop()
+    try:
+        with term.cbreak():
+            while game.game_on:
+                key = await loop.run_in_executor(None, term.inkey, 0.1)
+                if key: game.input_queue.put((key, time.perf_counter()))
     except Exception:
         game.handle_error()
\ No newline at end of file
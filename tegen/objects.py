@@ -1,10 +1,25 @@
-from typing import List, Tuple, Dict, Optional
-import blessed
+from typing import List, Tuple, Dict, Optional, Union
+from collections import OrderedDict
+import functools
+import os
+import shutil
+import wcwidth
+import numpy as np
 from blessed.keyboard import Keystroke
 
 import tegen.pixel as pixel
 
 
+@functools.lru_cache(maxsize=4096)
+def _char_width(char: str) -> int:
+    """:meta private:"""
+    return max(wcwidth.wcwidth(char), 0)
+
+def _line_width(line: str) -> int:
+    """:meta private:"""
+    return sum(_char_width(c) for c in line)
+
+
 class Object:
     """The base class of all objects.
     
@@ -29,7 +44,24 @@ class Object:
     
        The ID of the object, set when added to a scene
        
-       .. versionadded:: 0.0"""
+       .. versionadded:: 0.0
+
+    .. py:attribute:: event_priority
+       :type: int
+
+       Objects with a higher priority handle events first, read when the object is added to a game
+
+       .. versionadded:: 0.2
+
+    .. py:attribute:: z
+       :type: int
+
+       The layer of the object, objects with a higher z are drawn over objects with a lower z
+
+       .. versionadded:: 0.2"""
+
+    event_priority = 0
+    z = 0
 
     def __init__(self):
         self.x: int = None
@@ -65,7 +97,7 @@ class Object:
 
     def update(self, g):
         """This method is to be overridden when extended.
-        Called every tick of the game loop.
+        Called every tick of the game loop. The number of seconds that the tick simulates is ``g.dt``.
 
         .. versionadded:: 0.0
 
@@ -88,18 +120,68 @@ class Object:
         :param Game g: The game object
         :param Keystroke key: The key pressed"""
 
+    def on_collision(self, g, other: 'Object'):
+        """This method is to be overridden when extended.
+        Called after every tick of the game loop in which the object overlaps another, once for each other object.
+        Only :py:class:`Sprite` objects that are :py:attr:`~Sprite.collidable` collide.
+
+        .. versionadded:: 0.2
+
+        :param Game g: The game object
+        :param Object other: The object overlapped"""
+
 
 class Screen(Object):
     """Inherited from :py:class:`Object`. Represents the screen.
     
     .. versionadded:: 0.0
+
+    .. versionchanged:: 0.2
+       The size of the terminal is cached, see :py:meth:`refresh_size`
     
     :param int x: The game x coordinate of the topleft corner
-    :param int y: The game y coordinate of the topleft corner"""
+    :param int y: The game y coordinate of the topleft corner
+
+    .. py:attribute:: width
+       :type: int
+
+       The number of columns of the screen
+
+       .. versionadded:: 0.2
+
+    .. py:attribute:: height
+       :type: int
+
+       The number of rows of the screen
+
+       .. versionadded:: 0.2
+
+    .. py:attribute:: size_stale
+       :type: bool
+
+       Whether the terminal may have been resized since the size was last read,
+       set by the game when the terminal signals a resize
+
+       .. versionadded:: 0.2"""
 
     def __init__(self, x: int, y: int):
         self.x = x
         self.y = y
+        self.width, self.height = shutil.get_terminal_size()
+        self.size_stale = False
+
+    def refresh_size(self) -> bool:
+        """Reads the size of the terminal again.
+
+        .. versionadded:: 0.2
+
+        :returns: Whether the size changed
+        :rtype: bool"""
+        self.size_stale = False
+        width, height = shutil.get_terminal_size()
+        if (width, height) == (self.width, self.height): return False
+        self.width, self.height = width, height
+        return True
 
     def corners(self) -> List[Tuple[int, int]]:
         """Returns the global coordinates of the four corners of the screen.
@@ -108,11 +190,10 @@ class Screen(Object):
         
         :returns: A list of coordinates, in the form ``[tl, tr, bl, br]``
         :rtype: List[Tuple[int, int]]"""
-        term = blessed.Terminal()
         tl = self.x, self.y
-        tr = self.x+term.width-1, self.y
-        bl = self.x, self.y+term.height-1
-        br = self.x+term.width-1, self.y+term.height-1
+        tr = self.x+self.width-1, self.y
+        bl = self.x, self.y+self.height-1
+        br = self.x+self.width-1, self.y+self.height-1
         return [tl, tr, bl, br]
 
     def edges(self) -> Tuple[int, int, int, int]:
@@ -123,24 +204,47 @@ class Screen(Object):
 
         :returns: A tuple of values, in the form ``[lx, rx, ty, by]``
         :rtype: Tuple[int, int, int, int]"""
-        term = blessed.Terminal()
         lx = self.x
-        rx = self.x+term.width-1
+        rx = self.x+self.width-1
         ty = self.y
-        by = self.y+term.height-1
+        by = self.y+self.height-1
         return lx, rx, ty, by
 
 
 class Sprite(Object):
     """Inherited from :py:class:`Object`. Represents a sprite.
 
-    .. versionadded:: 0.0"""
+    .. versionadded:: 0.0
+
+    .. py:attribute:: pixels
+       :type: Union[PixelMap, ArrayPixelMap]
+
+       The pixels of the sprite, relative to its anchor
+
+       .. versionadded:: 0.0
+
+       .. versionchanged:: 0.2
+          Can also be an :py:class:`~tegen.pixel.ArrayPixelMap`
+
+    .. py:attribute:: collidable
+       :type: bool
+
+       Whether the sprite is in the :py:attr:`~tegen.game.Game.collisions` of the game,
+       read when the sprite is added to a game. ``False`` by default, so that sprites that never collide cost nothing
+
+       .. versionadded:: 0.2"""
+    pixels: Union[pixel.PixelMap, pixel.ArrayPixelMap]
     pixels = pixel.from_2d_array(fore=[['f00', 'aaa', 'f00'],
                                        ['aaa', 'f00', 'aaa'],
                                        ['f00', 'aaa', 'f00']],
                                  char=['███',
                                        '███',
                                        '███'])
+    collidable = False
+    _edges_key: tuple = None
+    _local_edges: Tuple[int, int, int, int] = None
+    _occupancy_key: tuple = None
+    _occupancy: np.ndarray = None
 
     def edges(self) -> Tuple[int, int, int, int]:
         """Returns the global x coordinate of the leftmost and rightmost columns,
@@ -150,28 +254,457 @@ class Sprite(Object):
 
         :returns: A tuple of values, in the form ``[lx, rx, ty, by]``
         :rtype: Tuple[int, int, int, int]"""
-        lx, ty = (float("inf"),)*2
-        rx, by = (0,)*2
-        for local_x, local_y in list(self.pixels.keys()):
-            if local_x > rx: rx = local_x
-            if local_x < lx: lx = local_x
-            if local_y > by: by = local_y
-            if local_y < ty: ty = local_y
-        
+        lx, rx, ty, by = self.local_edges()
         return self.x+lx, self.x+rx, self.y+ty, self.y+by
 
+    def local_edges(self) -> Tuple[int, int, int, int]:
+        """Returns the local x coordinate of the leftmost and rightmost columns,
+        and the local y coordinate of the topmost and bottommost rows of the sprite.
+        This is cached until :py:attr:`pixels` is replaced or changes size, or :py:meth:`refresh` is called.
+
+        .. versionadded:: 0.2
+
+        :returns: A tuple of values, in the form ``[lx, rx, ty, by]``
+        :rtype: Tuple[int, int, int, int]"""
+        pixels = self.pixels
+        key = (pixels, len(pixels) if isinstance(pixels, dict) else None)
+        cached = self._edges_key
+        if cached is not None and cached[0] is key[0] and cached[1] == key[1]:
+            return self._local_edges
+        if isinstance(pixels, pixel.ArrayPixelMap):
+            edges = pixels.local_edges()
+        elif len(pixels) == 0:
+            edges = (float("inf"), float("-inf"), float("inf"), float("-inf"))
+        else:
+            xs = [local_x for local_x, _ in pixels.keys()]
+            ys = [local_y for _, local_y in pixels.keys()]
+            edges = (min(xs), max(xs), min(ys), max(ys))
+        self._edges_key = key
+        self._local_edges = edges
+        return edges
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        for name in ('_edges_key', '_local_edges', '_occupancy_key', '_occupancy'): state.pop(name, None)
+        return state
+
+    def occupancy(self) -> np.ndarray:
+        """Returns where the sprite has pixels, within its :py:meth:`local_edges`.
+        This is cached in the same way as :py:meth:`local_edges`.
+
+        .. versionadded:: 0.2
+
+        :returns: A ``bool`` array of shape ``(height, width)``, with ``[0, 0]`` at the topleft corner of the edges
+        :rtype: numpy.ndarray"""
+        pixels = self.pixels
+        key = (pixels, len(pixels) if isinstance(pixels, dict) else None)
+        cached = self._occupancy_key
+        if cached is not None and cached[0] is key[0] and cached[1] == key[1]:
+            return self._occupancy
+        if not isinstance(pixels, pixel.ArrayPixelMap): pixels = pixel.ArrayPixelMap.from_dict(pixels)
+        self._occupancy_key = key
+        self._occupancy = pixels.mask()
+        return self._occupancy
+
+    def refresh(self):
+        """Clears the cached edges and occupancy of the sprite.
+        Only needed after pixels of :py:attr:`pixels` are changed in place without changing how many there are.
+
+        .. versionadded:: 0.2"""
+        self._edges_key = None
+        self._occupancy_key = None
+
     def local_move(self, x: int, y: int):
         """Move the sprite's local coordinates.
 
         .. versionadded:: 0.0
 
+        .. versionchanged:: 0.2
+           The moved coordinates are now kept
+
         :param x: The local x value to move the coordinates by
         :param y: The local y value to move the coordinates by
         """
+        if isinstance(self.pixels, pixel.ArrayPixelMap):
+            self.pixels = self.pixels.moved(x, y)
+            return
         new_pixels = {}
         for coords, pixel_dict in self.pixels.items():
             new_coords = (coords[0]+x, coords[1]+y)
             new_pixels[new_coords] = pixel_dict
+        self.pixels = new_pixels
+
+class AnimatedSprite(Sprite):
+    """Inherited from :py:class:`Sprite`. Represents a sprite that plays an :py:class:`~tegen.pixel.Animation`.
+    :py:attr:`pixels` is the current frame of the animation, which is advanced by ``g.dt`` every :py:meth:`pre_update`,
+    so subclasses that override :py:meth:`pre_update` should call ``super().pre_update(g)``.
+
+    .. versionadded:: 0.2
+
+    .. py:attribute:: animation
+       :type: Animation
+
+       The animation being played
+
+       .. versionadded:: 0.2
+
+    .. py:attribute:: frame
+       :type: int
+
+       The index of the frame being shown
+
+       .. versionadded:: 0.2
+
+    .. py:attribute:: frame_time
+       :type: float
+
+       The number of seconds the current frame has been shown for
+
+       .. versionadded:: 0.2
+
+    .. py:attribute:: playing
+       :type: bool
+
+       Whether the animation is advancing, set to ``False`` when an animation played ``once`` ends
+
+       .. versionadded:: 0.2
+
+    .. py:attribute:: speed
+       :type: float
+
+       How fast the animation is played, ``1`` being the speed of its durations
+
+       .. versionadded:: 0.2"""
+    animation: pixel.Animation = pixel.Animation([Sprite.pixels])
+    frame = 0
+    frame_time = 0.0
+    playing = True
+    speed = 1.0
+    _direction = 1
+
+    @property
+    def pixels(self) -> pixel.ArrayPixelMap:
+        return self.animation.frames[self.frame]
+
+    def local_edges(self) -> Tuple[int, int, int, int]:
+        """Returns the local x coordinate of the leftmost and rightmost columns,
+        and the local y coordinate of the topmost and bottommost rows of the sprite, which are the same for every frame.
+
+        .. versionadded:: 0.2
+
+        :returns: A tuple of values, in the form ``[lx, rx, ty, by]``
+        :rtype: Tuple[int, int, int, int]"""
+        return self.animation.local_edges()
+
+    def local_move(self, x: int, y: int):
+        """Move the local coordinates of every frame of the animation.
+
+        .. versionadded:: 0.2
+
+        :param x: The local x value to move the coordinates by
+        :param y: The local y value to move the coordinates by"""
+        self.animation = self.animation.moved(x, y)
+
+    def play(self, animation: Optional[pixel.Animation]=None, frame: int=0):
+        """Plays an animation from a frame.
+
+        .. versionadded:: 0.2
+
+        :param animation: The animation to play, defaults to the current one
+        :type animation: Optional[Animation]
+        :param int frame: The index of the frame to start from"""
+        if animation is not None: self.animation = animation
+        self.frame = frame
+        self.frame_time = 0.0
+        self.playing = True
+        self._direction = 1
+
+    def stop(self):
+        """Stops the animation at the current frame.
+
+        .. versionadded:: 0.2"""
+        self.playing = False
+
+    def advance(self, dt: float):
+        """Advances the animation by some time, moving through as many frames as that time covers.
+
+        .. versionadded:: 0.2
+
+        :param float dt: The number of seconds to advance by"""
+        if not self.playing: return
+        animation = self.animation
+        durations, last = animation.durations, len(animation)-1
+        self.frame_time += dt*self.speed
+        while self.frame_time >= durations[self.frame]:
+            self.frame_time -= durations[self.frame]
+            if animation.mode == 'loop':
+                self.frame = self.frame+1 if self.frame < last else 0
+            elif animation.mode == 'pingpong':
+                if last == 0: continue
+                if not 0 <= self.frame+self._direction <= last: self._direction = -self._direction
+                self.frame += self._direction
+            elif self.frame < last:
+                self.frame += 1
+            else:
+                self.frame_time = 0.0
+                self.playing = False
+                return
+
+    def pre_update(self, g):
+        """Advances the animation by ``g.dt``.
+
+        .. versionadded:: 0.2
+
+        :param Game g: The game object"""
+        self.advance(g.dt)
+
+class TileMap(Object):
+    """Inherited from :py:class:`Object`. Represents a grid of tiles, such as the level of a game,
+    stored as square chunks of indices into a shared tile set.
+    Only the chunks on the screen are drawn, and the pixels of each chunk are generated when it is first drawn.
+    If ``directory`` is set, chunks are loaded from it when first used.
+    The tile ``(0, 0)`` is at :py:attr:`x` and :py:attr:`y`. Set :py:attr:`z` lower than other objects to draw it behind them.
+
+    .. versionadded:: 0.2
+
+    :param tileset: The tiles, which must all be the same size. The index of a tile is its position in the list
+    :type tileset: List[Union[PixelMap, ArrayPixelMap]]
+    :param int chunk_size: The number of tiles along each side of a chunk
+    :param directory: The directory to load chunks from, as files of the form ``{cx}_{cy}.npy`` made by :py:meth:`save`
+    :type directory: Optional[str]
+    :param int cache_size: The maximum number of chunks to keep the pixels of
+    :raises ValueError: if ``tileset`` is empty, or the tiles are not the same size
+
+    .. py:attribute:: tileset
+       :type: List[ArrayPixelMap]
+
+       The tiles
+
+       .. versionadded:: 0.2
+
+    .. py:attribute:: tile_size
+       :type: Tuple[int, int]
+
+       The size of each tile, in the form ``(width, height)``
+
+       .. versionadded:: 0.2
+
+    .. py:attribute:: chunk_size
+       :type: int
+
+       The number of tiles along each side of a chunk
+
+       .. versionadded:: 0.2
+
+    .. py:attribute:: directory
+       :type: Optional[str]
+
+       The directory to load chunks from
+
+       .. versionadded:: 0.2"""
+
+    EMPTY = -1
+    """The index of tiles with nothing in them"""
+
+    def __init__(self, tileset: List[Union[pixel.PixelMap, pixel.ArrayPixelMap]], chunk_size: int=16,
+                 directory: Optional[str]=None, cache_size: int=64):
+        super().__init__()
+        if len(tileset) == 0:
+            raise ValueError("'tileset' is empty")
+        self.tileset = [t if isinstance(t, pixel.ArrayPixelMap) else pixel.ArrayPixelMap.from_dict(t) for t in tileset]
+        self.tile_size = self.tileset[0].size()
+        if any(t.size() != self.tile_size for t in self.tileset):
+            raise ValueError("The tiles of 'tileset' are not the same size")
+        self.chunk_size = chunk_size
+        self.directory = directory
+        self.cache_size = cache_size
+        self._chunks: Dict[Tuple[int, int], np.ndarray] = {}
+        self._rasters: "OrderedDict[Tuple[int, int], pixel.ArrayPixelMap]" = OrderedDict()
+        self._planes = self._stack_tiles()
+        self._empty = self._empty_chunk()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['_rasters'], state['_planes'], state['_empty']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._rasters = OrderedDict()
+        self._planes = self._stack_tiles()
+        self._empty = self._empty_chunk()
+
+    def _empty_chunk(self) -> np.ndarray:
+        """:meta private:"""
+        # returned for chunks that are only read, so that looking at the map does not keep a chunk for every place
+        empty = np.full((self.chunk_size, self.chunk_size), self.EMPTY, dtype=np.int32)
+        empty.flags.writeable = False
+        return empty
+
+    def _stack_tiles(self) -> Dict[str, np.ndarray]:
+        """:meta private:"""
+        # the planes of every tile stacked, with an empty tile last so that EMPTY indexes it
+        blank = pixel.ArrayPixelMap.empty(*self.tile_size)
+        return {name: np.stack([getattr(t, name) for t in self.tileset+[blank]])
+                for name in ('back', 'back_mask', 'fore', 'fore_mask', 'char')}
+
+    def edges(self) -> Tuple[float, float, float, float]:
+        """Returns the global x coordinate of the leftmost and rightmost columns,
+        and the global y coordinate of the topmost and bottommost rows, which are infinite as the map has no bounds.
+
+        .. versionadded:: 0.2
+
+        :returns: A tuple of values, in the form ``[lx, rx, ty, by]``
+        :rtype: Tuple[float, float, float, float]"""
+        return float("-inf"), float("inf"), float("-inf"), float("inf")
+
+    def _chunk_path(self, cx: int, cy: int) -> str:
+        """:meta private:"""
+        return os.path.join(self.directory, f"{cx}_{cy}.npy")
+
+    def chunk(self, cx: int, cy: int, create: bool=False) -> np.ndarray:
+        """Returns the tile indices of a chunk, loading it from :py:attr:`directory` if it has not been used yet.
+        A chunk that has not been set and is not in :py:attr:`directory` is a read-only array of :py:attr:`EMPTY`
+        shared by every such chunk, unless ``create`` is set.
+        Call :py:meth:`refresh_chunk` after changing the array in place.
+
+        .. versionadded:: 0.2
+
+        :param int cx: The x coordinate of the chunk
+        :param int cy: The y coordinate of the chunk
+        :param bool create: Whether to create the chunk if it has not been set, so that it can be changed in place
+        :returns: An ``int32`` array of shape ``(chunk_size, chunk_size)``, indexed by ``[row, column]``
+        :rtype: numpy.ndarray"""
+        chunk = self._chunks.get((cx, cy))
+        if chunk is not None: return chunk
+        size = self.chunk_size
+        fp = None if self.directory is None else self._chunk_path(cx, cy)
+        if fp is not None and os.path.exists(fp):
+            chunk = np.load(fp).astype(np.int32)
+            if chunk.shape != (size, size):
+                raise ValueError(f"Chunk {fp} is of shape {chunk.shape}, not {(size, size)}")
+        elif create:
+            chunk = np.full((size, size), self.EMPTY, dtype=np.int32)
+        else:
+            return self._empty
+        self._chunks[cx, cy] = chunk
+        return chunk
+
+    def refresh_chunk(self, cx: int, cy: int):
+        """Clears the cached pixels of a chunk.
+
+        .. versionadded:: 0.2
+
+        :param int cx: The x coordinate of the chunk
+        :param int cy: The y coordinate of the chunk"""
+        self._rasters.pop((cx, cy), None)
+
+    def get_tile(self, tx: int, ty: int) -> int:
+        """Returns the index of a tile.
+
+        .. versionadded:: 0.2
+
+        :param int tx: The x coordinate of the tile, in tiles
+        :param int ty: The y coordinate of the tile, in tiles
+        :rtype: int"""
+        size = self.chunk_size
+        return int(self.chunk(tx//size, ty//size)[ty % size, tx % size])
+
+    def set_tile(self, tx: int, ty: int, index: int):
+        """Sets the index of a tile.
+
+        .. versionadded:: 0.2
+
+        :param int tx: The x coordinate of the tile, in tiles
+        :param int ty: The y coordinate of the tile, in tiles
+        :param int index: The index of the tile in :py:attr:`tileset`, or :py:attr:`EMPTY`
+        :raises IndexError: if ``index`` is not in :py:attr:`tileset` and is not :py:attr:`EMPTY`"""
+        if not self.EMPTY <= index < len(self.tileset):
+            raise IndexError(f"Tile {index} is not in the tile set")
+        size = self.chunk_size
+        self.chunk(tx//size, ty//size, create=True)[ty % size, tx % size] = index
+        self.refresh_chunk(tx//size, ty//size)
+
+    def tile_at(self, x: int, y: int) -> Tuple[int, int]:
+        """Returns the tile at a global coordinate.
+
+        .. versionadded:: 0.2
+
+        :param int x: The global x coordinate
+        :param int y: The global y coordinate
+        :returns: The coordinates of the tile, in tiles
+        :rtype: Tuple[int, int]"""
+        tw, th = self.tile_size
+        return (int(x)-int(self.x))//tw, (int(y)-int(self.y))//th
+
+    def visible_chunks(self, lx: int, rx: int, ty: int, by: int) -> List[Tuple[int, int]]:
+        """Returns the chunks that overlap a rectangle, such as the edges of the screen.
+
+        .. versionadded:: 0.2
+
+        :param int lx: The global x coordinate of the leftmost column of the rectangle
+        :param int rx: The global x coordinate of the rightmost column of the rectangle
+        :param int ty: The global y coordinate of the topmost row of the rectangle
+        :param int by: The global y coordinate of the bottommost row of the rectangle
+        :returns: The coordinates of the chunks
+        :rtype: List[Tuple[int, int]]"""
+        tw, th = self.tile_size
+        cw, ch = tw*self.chunk_size, th*self.chunk_size
+        ox, oy = int(self.x), int(self.y)
+        return [(cx, cy) for cy in range((ty-oy)//ch, (by-oy)//ch+1)
+                for cx in range((lx-ox)//cw, (rx-ox)//cw+1)]
+
+    def chunk_pixels(self, cx: int, cy: int) -> pixel.ArrayPixelMap:
+        """Returns the pixels of a chunk, generated from the tile set the first time and cached after.
+        The local coordinate ``(0, 0)`` is the topleft corner of the chunk.
+
+        .. versionadded:: 0.2
+
+        :param int cx: The x coordinate of the chunk
+        :param int cy: The y coordinate of the chunk
+        :rtype: ArrayPixelMap"""
+        raster = self._rasters.get((cx, cy))
+        if raster is not None:
+            self._rasters.move_to_end((cx, cy))
+            return raster
+        chunk = self.chunk(cx, cy)
+        size = self.chunk_size
+        tw, th = self.tile_size
+        planes = {}
+        for name, tiles in self._planes.items():
+            # (rows, columns, th, tw, ...) to (rows*th, columns*tw, ...)
+            p = tiles[chunk].swapaxes(1, 2)
+            planes[name] = p.reshape((size*th, size*tw)+p.shape[4:])
+        raster = pixel.ArrayPixelMap(**planes)
+        self._rasters[cx, cy] = raster
+        while len(self._rasters) > self.cache_size: self._rasters.popitem(last=False)
+        return raster
+
+    def chunk_origin(self, cx: int, cy: int) -> Tuple[int, int]:
+        """Returns the global coordinate of the topleft corner of a chunk.
+
+        .. versionadded:: 0.2
+
+        :param int cx: The x coordinate of the chunk
+        :param int cy: The y coordinate of the chunk
+        :rtype: Tuple[int, int]"""
+        tw, th = self.tile_size
+        return int(self.x)+cx*tw*self.chunk_size, int(self.y)+cy*th*self.chunk_size
+
+    def save(self, directory: Optional[str]=None):
+        """Saves every chunk that has been set or loaded to files of the form ``{cx}_{cy}.npy``.
+
+        .. versionadded:: 0.2
+
+        :param directory: The directory to save to, defaults to :py:attr:`directory`
+        :type directory: Optional[str]
+        :raises ValueError: if ``directory`` and :py:attr:`directory` are both ``None``"""
+        directory = directory if directory is not None else self.directory
+        if directory is None:
+            raise ValueError("No directory to save to")
+        os.makedirs(directory, exist_ok=True)
+        for (cx, cy), chunk in list(self._chunks.items()):
+            np.save(os.path.join(directory, f"{cx}_{cy}.npy"), chunk)
 
 class Text(Object):
     """Inherited from :py:class:`Object`. Represents some text on a screen.
@@ -215,6 +748,8 @@ class Text(Object):
     anchor = 'tl'
     back: Tuple[int, int, int] = None
     fore: Tuple[int, int, int] = None
+    _layout_key: Tuple[str, str] = None
+    _layout: Tuple[Dict[tuple, str], Tuple[int, int, int, int]] = None
 
     def __init__(self, text: str, back: Optional[pixel.Colour]=None, fore: Optional[pixel.Colour]=None):
         super().__init__()
@@ -228,36 +763,64 @@ class Text(Object):
 
         .. versionadded:: 0.0
 
+        .. versionchanged:: 0.2
+           Now takes :py:attr:`anchor` and the displayed width of characters into account
+
         :returns: A tuple of values, in the form ``[lx, rx, ty, by]``
         :rtype: Tuple[int, int, int, int]"""
-        w = max([len(l) for l in self.text.split("\n")])
-        h = self.text.count('\n')+1
-        return self.x, self.x+w-1, self.y, self.y+h-1
+        lx, rx, ty, by = self._get_layout()[1]
+        return self.x+lx, self.x+rx, self.y+ty, self.y+by
 
     def get_char_positions(self) -> Dict[tuple, str]:
         """Get the positions of each character relative to the anchor.
 
         .. versionadded:: 0.0
 
+        .. versionchanged:: 0.2
+           Characters take up as many columns as they are displayed with, eg 2 for CJK characters and emoji.
+           The columns after the first column of a character map to ``""``, and zero-width characters are left out.
+           The result is cached until :py:attr:`text` or :py:attr:`anchor` changes, and should not be modified
+
         :returns: A dict in the form ``{(local x, local y): char}``
         :rtype: Dict[tuple, str]
         :raises ValueError: if ``anchor`` is not one of ``tr``, ``tl``, ``br``, ``bl``, ``center``"""
-        text = self.text
-        w = max([len(l) for l in text.split("\n")])
+        return self._get_layout()[0]
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        for name in ('_layout_key', '_layout'): state.pop(name, None)
+        return state
+
+    def _get_layout(self) -> Tuple[Dict[tuple, str], Tuple[int, int, int, int]]:
+        """:meta private:"""
+        text, anchor = self.text, self.anchor
+        key = self._layout_key
+        if key is not None and key[0] == text and key[1] == anchor:
+            return self._layout
+        lines = text.split('\n')
+        w = max([_line_width(l) for l in lines])
         h = text.count('\n')
-        if self.anchor == "center":
+        if anchor == "center":
             ox = round(w / 2)
             oy = round(h / 2)
         else:
-            if self.anchor not in ['tr', 'tl', 'br', 'bl']:
+            if anchor not in ['tr', 'tl', 'br', 'bl']:
                 raise ValueError("'anchor' is not one of 'center', 'tr', 'tl', 'br', 'bl'")
-            ox = 0 if self.anchor[1] == 'l' else w - 0
-            oy = 0 if self.anchor[0] == 't' else h - 0
+            ox = 0 if anchor[1] == 'l' else w - 0
+            oy = 0 if anchor[0] == 't' else h - 0
         result = {}
-        for line_num, line in enumerate(text.split('\n')):
-            for char_num, char in enumerate(line):
-                result[char_num-ox, line_num-oy] = char
-        return result
+        for line_num, line in enumerate(lines):
+            col = 0
+            for char in line:
+                char_width = _char_width(char)
+                if char_width == 0: continue
+                result[col-ox, line_num-oy] = char
+                for extra in range(1, char_width):
+                    result[col+extra-ox, line_num-oy] = ""
+                col += char_width
+        self._layout = result, (-ox, w-1-ox, -oy, h-oy)
+        self._layout_key = (text, anchor)
+        return self._layout
 
 class TextInput(Text):
     """Inherited from :py:class:`Text`. Represents a text input box.
@@ -316,7 +879,7 @@ class TextInput(Text):
         self.cursor.text_pos = len(self.text)
         self.cursor.pixels = pixel.from_2d_array(char=[" "],
                                                  back=[[0x808080 if self.back is None else 0xffffff-self.back]])
-        x = self.x + len(self.text.split("\n")[-1])
+        x = self.x + _line_width(self.text.split("\n")[-1])
         y = self.y + self.text.count("\n")
         game.add_object(self.cursor, f"/{self.id}.cursor/", x, y, override=True)
         game.wait_until_key_released()
@@ -338,11 +901,11 @@ class TextInput(Text):
                 char = self.text[self.cursor.text_pos-1]
                 self.text = self.text[:self.cursor.text_pos-1] + self.text[self.cursor.text_pos:]
                 if char != "\n":
-                    self.cursor.x -= 1
+                    self.cursor.x -= _char_width(char)
                 else:
                     self.cursor.y -= 1
                     self.cursor.line -= 1
-                    self.cursor.x = self.x + len(self.text.split("\n")[self.cursor.line])
+                    self.cursor.x = self.x + _line_width(self.text.split("\n")[self.cursor.line])
                 self.cursor.text_pos -= 1
             elif key.name == 'KEY_DELETE':
                 if self.text == "" or self.cursor.text_pos == len(self.text): return
@@ -355,20 +918,20 @@ class TextInput(Text):
                     self.cursor.x = self.x
                     self.cursor.y += 1
                 else:
-                    self.cursor.x += 1
+                    self.cursor.x += _char_width(self.text[self.cursor.text_pos])
                 self.cursor.text_pos += 1
             elif key.name == 'KEY_LEFT':
                 if self.cursor.text_pos == 0: return
                 if self.text[self.cursor.text_pos-1] == "\n":
                     self.cursor.line -= 1
-                    self.cursor.x = len(self.text.split("\n")[self.cursor.line])
+                    self.cursor.x = self.x + _line_width(self.text.split("\n")[self.cursor.line])
                     self.cursor.y -= 1
                 else:
-                    self.cursor.x -= 1
+                    self.cursor.x -= _char_width(self.text[self.cursor.text_pos-1])
                 self.cursor.text_pos -= 1
         else:
             self.text = self.text[:self.cursor.text_pos] + str(key) + self.text[self.cursor.text_pos:]
-            self.cursor.x += 1
+            self.cursor.x += _line_width(str(key))
             self.cursor.text_pos += 1
 
     def release(self):
@@ -1,10 +1,313 @@
-from typing import List, Optional, Union, Tuple, Dict
+from typing import List, Optional, Union, Tuple, Dict, Sequence
+import functools
 import re
+import numpy as np
 from PIL import Image
 
 PixelMap = Dict[tuple, Dict[str, Union[str, Tuple[int, int, int]]]]
 Colour = Union[Union[int, str], Union[tuple, list]]
 
+class ArrayPixelMap:
+    """A map of pixels stored as arrays, a compact alternative to :py:data:`PixelMap`.
+    Can be used as :py:attr:`Sprite.pixels <tegen.objects.Sprite.pixels>` in place of a :py:data:`PixelMap`.
+
+    .. versionadded:: 0.2
+
+    :param back: The background colours, of shape ``(height, width, 3)``
+    :type back: numpy.ndarray
+    :param back_mask: Where the background colours are set, of shape ``(height, width)``
+    :type back_mask: numpy.ndarray
+    :param fore: The foreground colours, of shape ``(height, width, 3)``
+    :type fore: numpy.ndarray
+    :param fore_mask: Where the foreground colours are set, of shape ``(height, width)``
+    :type fore_mask: numpy.ndarray
+    :param char: The codepoints of the characters, of shape ``(height, width)``, where ``0`` is no character
+    :type char: numpy.ndarray
+    :param origin: The array index ``(column, row)`` of the local coordinate ``(0, 0)``
+    :type origin: Tuple[int, int]
+
+    .. py:attribute:: back
+       :type: numpy.ndarray
+
+       The background colours, as a ``uint8`` array of shape ``(height, width, 3)``
+
+       .. versionadded:: 0.2
+
+    .. py:attribute:: back_mask
+       :type: numpy.ndarray
+
+       Where the background colours are set, as a ``bool`` array of shape ``(height, width)``
+
+       .. versionadded:: 0.2
+
+    .. py:attribute:: fore
+       :type: numpy.ndarray
+
+       The foreground colours, as a ``uint8`` array of shape ``(height, width, 3)``
+
+       .. versionadded:: 0.2
+
+    .. py:attribute:: fore_mask
+       :type: numpy.ndarray
+
+       Where the foreground colours are set, as a ``bool`` array of shape ``(height, width)``
+
+       .. versionadded:: 0.2
+
+    .. py:attribute:: char
+       :type: numpy.ndarray
+
+       The codepoints of the characters, as a ``uint32`` array of shape ``(height, width)``, where ``0`` is no character
+
+       .. versionadded:: 0.2
+
+    .. py:attribute:: origin
+       :type: Tuple[int, int]
+
+       The array index ``(column, row)`` of the local coordinate ``(0, 0)``
+
+       .. versionadded:: 0.2"""
+
+    def __init__(self, back: np.ndarray, back_mask: np.ndarray, fore: np.ndarray, fore_mask: np.ndarray,
+                 char: np.ndarray, origin: Tuple[int, int]=(0, 0)):
+        self.back = np.asarray(back, dtype=np.uint8)
+        self.back_mask = np.asarray(back_mask, dtype=bool)
+        self.fore = np.asarray(fore, dtype=np.uint8)
+        self.fore_mask = np.asarray(fore_mask, dtype=bool)
+        self.char = np.asarray(char, dtype=np.uint32)
+        self.origin = origin
+
+    @classmethod
+    def empty(cls, width: int, height: int, origin: Tuple[int, int]=(0, 0)) -> 'ArrayPixelMap':
+        """Creates a map of pixels with nothing set.
+
+        .. versionadded:: 0.2
+
+        :param int width: The number of columns
+        :param int height: The number of rows
+        :param origin: The array index ``(column, row)`` of the local coordinate ``(0, 0)``
+        :type origin: Tuple[int, int]
+        :rtype: ArrayPixelMap"""
+        return cls(np.zeros((height, width, 3), dtype=np.uint8), np.zeros((height, width), dtype=bool),
+                   np.zeros((height, width, 3), dtype=np.uint8), np.zeros((height, width), dtype=bool),
+                   np.zeros((height, width), dtype=np.uint32), origin)
+
+    @classmethod
+    def from_dict(cls, pixels: PixelMap) -> 'ArrayPixelMap':
+        """Converts a :py:data:`PixelMap` to an array-backed map of pixels.
+
+        .. versionadded:: 0.2
+
+        :param PixelMap pixels: The map of pixels to convert
+        :rtype: ArrayPixelMap"""
+        if len(pixels) == 0: return cls.empty(0, 0)
+        xs = [x for x, _ in pixels.keys()]
+        ys = [y for _, y in pixels.keys()]
+        lx, ty = min(xs), min(ys)
+        result = cls.empty(max(xs)-lx+1, max(ys)-ty+1, (-lx, -ty))
+        for (x, y), info in pixels.items():
+            back, fore, char = info.get('back'), info.get('fore'), info.get('char')
+            if back is not None:
+                result.back[y-ty, x-lx] = back
+                result.back_mask[y-ty, x-lx] = True
+            if fore is not None:
+                result.fore[y-ty, x-lx] = fore
+                result.fore_mask[y-ty, x-lx] = True
+            if char is not None: result.char[y-ty, x-lx] = ord(char)
+        return result
+
+    def to_dict(self) -> PixelMap:
+        """Converts the map of pixels to a :py:data:`PixelMap`. Pixels with nothing set are left out.
+
+        .. versionadded:: 0.2
+
+        :rtype: PixelMap"""
+        ox, oy = self.origin
+        back, fore, char = self.back.tolist(), self.fore.tolist(), self.char.tolist()
+        back_mask, fore_mask = self.back_mask.tolist(), self.fore_mask.tolist()
+        result = {}
+        for y, x in zip(*np.nonzero(self.mask())):
+            y, x = int(y), int(x)
+            result[x-ox, y-oy] = {'back': tuple(back[y][x]) if back_mask[y][x] else None,
+                                  'fore': tuple(fore[y][x]) if fore_mask[y][x] else None,
+                                  'char': chr(char[y][x]) if char[y][x] != 0 else None}
+        return result
+
+    def mask(self) -> np.ndarray:
+        """Returns where any of the background, foreground or character is set.
+
+        .. versionadded:: 0.2
+
+        :returns: A ``bool`` array of shape ``(height, width)``
+        :rtype: numpy.ndarray"""
+        return self.back_mask | self.fore_mask | (self.char != 0)
+
+    def size(self) -> Tuple[int, int]:
+        """Returns the size of the map of pixels.
+
+        .. versionadded:: 0.2
+
+        :returns: A tuple in the form ``(width, height)``
+        :rtype: Tuple[int, int]"""
+        return self.char.shape[1], self.char.shape[0]
+
+    def local_edges(self) -> Tuple[int, int, int, int]:
+        """Returns the local x coordinate of the leftmost and rightmost columns,
+        and the local y coordinate of the topmost and bottommost rows.
+
+        .. versionadded:: 0.2
+
+        :returns: A tuple of values, in the form ``[lx, rx, ty, by]``
+        :rtype: Tuple[int, int, int, int]"""
+        ox, oy = self.origin
+        w, h = self.size()
+        return -ox, w-1-ox, -oy, h-1-oy
+
+    def moved(self, x: int, y: int) -> 'ArrayPixelMap':
+        """Returns the map of pixels with its local coordinates moved. The arrays are shared, not copied.
+
+        .. versionadded:: 0.2
+
+        :param int x: The local x value to move the coordinates by
+        :param int y: The local y value to move the coordinates by
+        :rtype: ArrayPixelMap"""
+        ox, oy = self.origin
+        return ArrayPixelMap(self.back, self.back_mask, self.fore, self.fore_mask, self.char, (ox-x, oy-y))
+
+class Animation:
+    """Frames of pixels stored together in one atlas, with how long each frame is shown.
+    The frames are padded to the same size and share their origin, and are stacked from top to bottom in :py:attr:`atlas`.
+
+    .. versionadded:: 0.2
+
+    :param frames: The frames of the animation
+    :type frames: Sequence[Union[PixelMap, ArrayPixelMap]]
+    :param durations: The number of seconds each frame is shown, either for every frame or one for each frame
+    :type durations: Union[float, Sequence[float]]
+    :param str mode: How the animation is played, one of :py:data:`Animation.MODES`
+    :raises ValueError: if there are no frames
+    :raises ValueError: if the number of durations is not the number of frames, or a duration is not positive
+    :raises ValueError: if ``mode`` is not one of :py:data:`Animation.MODES`
+
+    .. py:attribute:: atlas
+       :type: ArrayPixelMap
+
+       The frames, stacked from top to bottom
+
+       .. versionadded:: 0.2
+
+    .. py:attribute:: frames
+       :type: List[ArrayPixelMap]
+
+       Views of each frame in :py:attr:`atlas`
+
+       .. versionadded:: 0.2
+
+    .. py:attribute:: durations
+       :type: Tuple[float, ...]
+
+       The number of seconds each frame is shown
+
+       .. versionadded:: 0.2
+
+    .. py:attribute:: mode
+       :type: str
+
+       How the animation is played, ``loop`` to start again after the last frame,
+       ``pingpong`` to play backwards and forwards, or ``once`` to stop at the last frame
+
+       .. versionadded:: 0.2"""
+
+    MODES = ('loop', 'pingpong', 'once')
+
+    def __init__(self, frames: Sequence[Union[PixelMap, ArrayPixelMap]], durations: Union[float, Sequence[float]]=0.1,
+                 mode: str='loop'):
+        if len(frames) == 0:
+            raise ValueError("'frames' is empty")
+        frames = [f if isinstance(f, ArrayPixelMap) else ArrayPixelMap.from_dict(f) for f in frames]
+        edges = [f.local_edges() for f in frames if f.size() != (0, 0)] or [(0, -1, 0, -1)]
+        lx, ty = min(e[0] for e in edges), min(e[2] for e in edges)
+        w, h = max(e[1] for e in edges)-lx+1, max(e[3] for e in edges)-ty+1
+        atlas = ArrayPixelMap.empty(w, h*len(frames), (-lx, -ty))
+        for i, f in enumerate(frames):
+            if f.size() == (0, 0): continue
+            flx, _, fty, _ = f.local_edges()
+            fw, fh = f.size()
+            dst = (slice(i*h+fty-ty, i*h+fty-ty+fh), slice(flx-lx, flx-lx+fw))
+            for name in ('back', 'back_mask', 'fore', 'fore_mask', 'char'):
+                getattr(atlas, name)[dst] = getattr(f, name)
+        self._init(atlas, len(frames), durations, mode)
+
+    def _init(self, atlas: ArrayPixelMap, count: int, durations: Union[float, Sequence[float]], mode: str):
+        """:meta private:"""
+        if isinstance(durations, (int, float)): durations = [durations]*count
+        durations = tuple(float(d) for d in durations)
+        if len(durations) != count:
+            raise ValueError(f"There are {count} frames but {len(durations)} durations")
+        if any(d <= 0 for d in durations):
+            raise ValueError("Durations must be positive")
+        if mode not in self.MODES:
+            raise ValueError(f"'mode' is not one of {', '.join(self.MODES)}")
+        h = atlas.size()[1]//count
+        self.atlas = atlas
+        self.durations = durations
+        self.mode = mode
+        self.frames = [ArrayPixelMap(atlas.back[i*h:(i+1)*h], atlas.back_mask[i*h:(i+1)*h],
+                                     atlas.fore[i*h:(i+1)*h], atlas.fore_mask[i*h:(i+1)*h],
+                                     atlas.char[i*h:(i+1)*h], atlas.origin) for i in range(count)]
+        self._local_edges = self.frames[0].local_edges()
+
+    @classmethod
+    def from_atlas(cls, atlas: ArrayPixelMap, count: int, durations: Union[float, Sequence[float]]=0.1,
+                   mode: str='loop') -> 'Animation':
+        """Creates an animation from frames already stacked from top to bottom, such as a sprite sheet or
+        an :py:attr:`atlas` loaded from a :py:class:`~tegen.assets.AssetCache`. The arrays are shared, not copied.
+
+        .. versionadded:: 0.2
+
+        :param ArrayPixelMap atlas: The frames, stacked from top to bottom, with the origin of the first frame
+        :param int count: The number of frames
+        :param durations: The number of seconds each frame is shown, either for every frame or one for each frame
+        :type durations: Union[float, Sequence[float]]
+        :param str mode: How the animation is played, one of :py:data:`Animation.MODES`
+        :rtype: Animation
+        :raises ValueError: if the height of ``atlas`` is not a multiple of ``count``"""
+        if count <= 0 or atlas.size()[1] % count != 0:
+            raise ValueError(f"The height of 'atlas' is not a multiple of {count}")
+        result = cls.__new__(cls)
+        result._init(atlas, count, durations, mode)
+        return result
+
+    def __len__(self) -> int:
+        return len(self.frames)
+
+    def __reduce__(self):
+        return _animation_from_atlas, (self.atlas, len(self), self.durations, self.mode)
+
+    def local_edges(self) -> Tuple[int, int, int, int]:
+        """Returns the local x coordinate of the leftmost and rightmost columns,
+        and the local y coordinate of the topmost and bottommost rows, which are the same for every frame.
+
+        .. versionadded:: 0.2
+
+        :returns: A tuple of values, in the form ``[lx, rx, ty, by]``
+        :rtype: Tuple[int, int, int, int]"""
+        return self._local_edges
+
+    def moved(self, x: int, y: int) -> 'Animation':
+        """Returns the animation with its local coordinates moved. The atlas is shared, not copied.
+
+        .. versionadded:: 0.2
+
+        :param int x: The local x value to move the coordinates by
+        :param int y: The local y value to move the coordinates by
+        :rtype: Animation"""
+        return Animation.from_atlas(self.atlas.moved(x, y), len(self), self.durations, self.mode)
+
+def _animation_from_atlas(atlas: ArrayPixelMap, count: int, durations, mode: str) -> Animation:
+    """:meta private:"""
+    return Animation.from_atlas(atlas, count, durations, mode)
+
 def _parse_colours(colour: Optional[Colour]) -> Optional[Tuple[int, int, int]]:
     """:meta private:"""
     if colour is None: return None
@@ -12,28 +315,26 @@ def _parse_colours(colour: Optional[Colour]) -> Optional[Tuple[int, int, int]]:
         if len(colour) != 3:
             raise ValueError(f"Colour sequence must have 3 values (Got {colour})")
         return tuple(colour)
-    if isinstance(colour, str):
-        m = re.search(r"^#?([0-9a-f]{6}|[0-9a-f]{3})$", colour)
-        if m is None:
-            raise ValueError(f"Invalid hex code")
-        hexc = m.group(1)
-        if len(hexc) == 3: hexc = 2*hexc[0]+2*hexc[1]+2*hexc[2]
-        return int(hexc[0:2], base=16), int(hexc[2:4], base=16), int(hexc[4:6], base=16)
+    if isinstance(colour, str): return _parse_hex(colour)
     elif isinstance(colour, int):
         hexc = hex(colour)[2:]
         while len(hexc) < 6: hexc = "0"+hexc
         return int(hexc[0:2], base=16), int(hexc[2:4], base=16), int(hexc[4:6], base=16)
 
+@functools.lru_cache(maxsize=1024)
+def _parse_hex(colour: str) -> Tuple[int, int, int]:
+    """:meta private:"""
+    m = re.search(r"^#?([0-9a-f]{6}|[0-9a-f]{3})$", colour)
+    if m is None:
+        raise ValueError(f"Invalid hex code")
+    hexc = m.group(1)
+    if len(hexc) == 3: hexc = 2*hexc[0]+2*hexc[1]+2*hexc[2]
+    return int(hexc[0:2], base=16), int(hexc[2:4], base=16), int(hexc[4:6], base=16)
+
 def _find_origin(order: Tuple[int, int], anchor: str):
     """:meta private:"""
-    lx, ty = (float("inf"),) * 2
-    rx, by = (0,) * 2
-    for y in range(order[1]):
-        for x in range(order[0]):
-            if x > rx: rx = x
-            if x < lx: lx = x
-            if y > by: by = y
-            if y < ty: ty = y
+    lx, ty = 0, 0
+    rx, by = order[0]-1, order[1]-1
     if anchor == "center":
         ox = round((lx + rx) / 2)
         oy = round((ty + by) / 2)
@@ -45,16 +346,21 @@ def _find_origin(order: Tuple[int, int], anchor: str):
     return ox, oy
 
 def from_2d_array(back: Optional[List[List[str]]]=None, fore: Optional[List[List[str]]]=None,
-                  char: Optional[List[str]]=None, anchor: str='tl') -> PixelMap:
+                  char: Optional[List[str]]=None, anchor: str='tl',
+                  as_array: bool=False) -> Union[PixelMap, ArrayPixelMap]:
     """Generates a map of pixels from 2d arrays.
 
     .. versionadded:: 0.0
 
+    .. versionchanged:: 0.2
+       Added ``as_array``
+
     :param List[List[str]] back: A list of lists of colours as the background
     :param List[List[str]] fore: A list of lists of colours as the foreground
     :param List[str] char: A list of strings as rows as the characters
     :param str anchor: The corner to set the local coordinate as ``(0, 0)``, choose from ``tr``, ``tl``, ``br``, ``bl``, ``center``
-    :rtype: PixelMap
+    :param bool as_array: Whether to return an :py:class:`ArrayPixelMap` instead of a :py:data:`PixelMap`
+    :rtype: PixelMap or ArrayPixelMap
     :raises ValueError: if ``back``, ``fore``, or ``char`` has no columns, or is a list of empty rows
     :raises ValueError: if ``back``, ``fore``, or ``char`` has inconsistent lengths of rows
     :raises ValueError: if ``back``, ``fore``, or ``char`` have inconsistent array sizes"""
@@ -83,7 +389,23 @@ def from_2d_array(back: Optional[List[List[str]]]=None, fore: Optional[List[List
             prev = name
 
     # find anchor
-    ox, oy = _find_origin(order, anchor)
+    ox, oy = _find_origin((order[1], order[0]), anchor)
+
+    if as_array:
+        result = ArrayPixelMap.empty(order[1], order[0], (ox, oy))
+        for name, a in [('back', back), ('fore', fore)]:
+            if a is None: continue
+            for y, yv in enumerate(a):
+                for x, xv in enumerate(yv):
+                    v = _parse_colours(xv)
+                    if v is None: continue
+                    getattr(result, name)[y, x] = v
+                    getattr(result, name+'_mask')[y, x] = True
+        if char is not None:
+            for y, yv in enumerate(char):
+                for x, xv in enumerate(yv):
+                    if xv.strip() != '': result.char[y, x] = ord(xv)
+        return result
 
     result = {}
     for name, a in [('back', back), ('fore', fore), ('char', char)]:
@@ -96,27 +418,95 @@ def from_2d_array(back: Optional[List[List[str]]]=None, fore: Optional[List[List
                 result[x-ox, y-oy][name] = v
     return result
 
-def from_image(fp: str, anchor: str='tl', layer: str='fore', char: str='█') -> PixelMap:
-    """Generates a map of pixels from an image. Each pixel in the image represents one character in the terminal.
+RESAMPLING: Dict[str, int] = {
+    'nearest': Image.Resampling.NEAREST,
+    'box': Image.Resampling.BOX,
+    'bilinear': Image.Resampling.BILINEAR,
+    'hamming': Image.Resampling.HAMMING,
+    'bicubic': Image.Resampling.BICUBIC,
+    'lanczos': Image.Resampling.LANCZOS,
+}
+"""The resampling filters that can be used by :py:func:`from_image`"""
+
+def _target_size(size: Tuple[int, int], target: Tuple[Optional[int], Optional[int]]) -> Tuple[int, int]:
+    """:meta private:"""
+    w, h = target
+    if w is None and h is None: return size
+    if w is None: w = max(round(size[0]*h/size[1]), 1)
+    if h is None: h = max(round(size[1]*w/size[0]), 1)
+    if w <= 0 or h <= 0:
+        raise ValueError(f"'size' must be positive (Got {target})")
+    return w, h
+
+def from_image(fp: str, anchor: str='tl', layer: str='fore', char: str='█',
+               as_array: bool=False, size: Optional[Tuple[Optional[int], Optional[int]]]=None,
+               resample: str='box', alpha_threshold: int=128,
+               half_block: bool=False) -> Union[PixelMap, ArrayPixelMap]:
+    """Generates a map of pixels from an image. Each pixel in the image represents one character in the terminal,
+    or with ``half_block``, each two pixels stacked vertically represent one character.
+    Pixels less opaque than ``alpha_threshold`` are transparent.
+    For large images, use ``as_array``, as a :py:data:`PixelMap` holds a dict for every pixel and is slow to build.
+
+    .. versionchanged:: 0.2
+       Added ``as_array``, ``size``, ``resample``, ``alpha_threshold`` and ``half_block``
 
     :param str fp: The file path of the image
     :param str anchor: The corner to set the local coordinate as ``(0, 0)``, choose from ``tr``, ``tl``, ``br``, ``bl``, ``center``
-    :param str layer: The layer to write the pixels to, choose from ``back``, ``fore``
-    :param str char: The character to serve as the single pixel
-    :rtype: PixelMap
+    :param str layer: The layer to write the pixels to, choose from ``back``, ``fore``. Not used with ``half_block``
+    :param str char: The character to serve as the single pixel. Not used with ``half_block``
+    :param bool as_array: Whether to return an :py:class:`ArrayPixelMap` instead of a :py:data:`PixelMap`
+    :param size: The size to scale the image to in characters, in the form ``(width, height)``.
+       If either is ``None``, it is found from the other and the aspect ratio of the image
+    :type size: Optional[Tuple[Optional[int], Optional[int]]]
+    :param str resample: The filter to scale the image with, one of :py:data:`RESAMPLING`
+    :param int alpha_threshold: The alpha from ``0`` to ``255`` that pixels need to be drawn
+    :param bool half_block: Whether to draw two pixels in each character with ``▀`` and ``▄``,
+       the top pixel as the foreground and the bottom pixel as the background
+    :rtype: PixelMap or ArrayPixelMap
     :raises ValueError: if ``layer`` is not ``back`` or ``fore``
-    :raises ValueError: if ``char`` is not 1 character long"""
+    :raises ValueError: if ``char`` is not 1 character long
+    :raises ValueError: if ``resample`` is not one of :py:data:`RESAMPLING`
+    :raises ValueError: if ``size`` is not positive"""
     if layer not in ['back', 'fore']:
         raise ValueError("'layer' is not 'back' or 'fore'")
     if len(char) != 1:
         raise ValueError("'char' is not 1 character long")
-    i = Image.open(fp)
-    pmap = i.load()
-    result = {}
-    ox, oy = _find_origin(i.size, anchor)
-    for x in range(i.size[0]):
-        for y in range(i.size[1]):
-            # pmap[x, y]
-            result[x-ox+2, y-oy][layer] = pmap[x, y]
-            result[x-ox+2, y-oy]['char'] = char
-    return result
\ No newline at end of file
+    if resample not in RESAMPLING:
+        raise ValueError(f"'resample' is not one of {', '.join(RESAMPLING.keys())}")
+    with Image.open(fp) as i:
+        i.load()
+        has_alpha = i.mode in ('RGBA', 'LA', 'PA') or 'transparency' in i.info
+        i = i.convert('RGBA' if has_alpha else 'RGB')
+    if size is not None:
+        w, h = size
+        if half_block and h is not None: h *= 2
+        w, h = _target_size(i.size, (w, h))
+        if (w, h) != i.size: i = i.resize((w, h), RESAMPLING[resample])
+    data = np.asarray(i)
+    rgb = data[..., :3]
+    opaque = data[..., 3] >= alpha_threshold if has_alpha else np.ones(rgb.shape[:2], dtype=bool)
+
+    if not half_block:
+        h, w = opaque.shape
+        result = ArrayPixelMap.empty(w, h, _find_origin((w, h), anchor))
+        getattr(result, layer)[...] = rgb
+        getattr(result, layer+'_mask')[...] = opaque
+        result.char[opaque] = ord(char)
+        return result if as_array else result.to_dict()
+
+    if rgb.shape[0] % 2 == 1:
+        rgb = np.concatenate([rgb, np.zeros_like(rgb[:1])])
+        opaque = np.concatenate([opaque, np.zeros_like(opaque[:1])])
+    top, bottom = rgb[0::2], rgb[1::2]
+    top_opaque, bottom_opaque = opaque[0::2], opaque[1::2]
+    h, w = top_opaque.shape
+    result = ArrayPixelMap.empty(w, h, _find_origin((w, h), anchor))
+    # the top pixel is drawn by ▀ in the foreground, unless only the bottom pixel is opaque, then by ▄
+    lower = bottom_opaque & ~top_opaque
+    result.fore[...] = np.where(lower[..., None], bottom, top)
+    result.fore_mask[...] = top_opaque | bottom_opaque
+    result.back[...] = bottom
+    result.back_mask[...] = top_opaque & bottom_opaque
+    result.char[top_opaque] = ord('▀')
+    result.char[lower] = ord('▄')
+    return result if as_array else result.to_dict()
@@ -0,0 +1,207 @@
+from typing import Dict, Optional
+from collections import deque
+import csv
+import io
+import json
+import threading
+
+from tegen.objects import Text
+
+PHASES = ('pre_update', 'update', 'post_update', 'collision', 'compose', 'encode', 'write')
+
+class Profiler:
+    """Records where the time of each frame is spent, in ring buffers of the last :py:attr:`size` frames.
+    Nothing is recorded unless :py:attr:`enabled` is ``True``.
+
+    .. versionadded:: 0.2
+
+    :param int size: The number of frames to keep
+
+    .. py:attribute:: enabled
+       :type: bool
+
+       Whether the profiler is recording, can be changed while the game is running
+
+       .. versionadded:: 0.2
+
+    .. py:attribute:: size
+       :type: int
+
+       The number of frames kept
+
+       .. versionadded:: 0.2
+
+    .. py:attribute:: phases
+       :type: Dict[str, deque]
+
+       The milliseconds spent each frame in each phase, one of ``pre_update``, ``update``, ``post_update``,
+       ``collision``, ``compose``, ``encode``, ``write``
+
+       .. versionadded:: 0.2
+
+    .. py:attribute:: objects
+       :type: Dict[str, deque]
+
+       The milliseconds spent each frame in the methods of each object, by object ID
+
+       .. versionadded:: 0.2
+
+    .. py:attribute:: events
+       :type: Dict[str, deque]
+
+       The milliseconds spent each frame dispatching each event, by event name
+
+       .. versionadded:: 0.2"""
+
+    def __init__(self, size: int=300):
+        self.enabled = False
+        self.size = size
+        self.phases: Dict[str, deque] = {phase: deque(maxlen=size) for phase in PHASES}
+        self.objects: Dict[str, deque] = {}
+        self.events: Dict[str, deque] = {}
+        self._lock = threading.Lock()
+        self._frame_phases: Dict[str, float] = {}
+        self._frame_objects: Dict[str, float] = {}
+        self._frame_events: Dict[str, float] = {}
+
+    def record(self, phase: str, seconds: float):
+        """Adds time spent in a phase to the current frame.
+
+        .. versionadded:: 0.2
+
+        :param str phase: The name of the phase
+        :param float seconds: The time spent"""
+        self._frame_phases[phase] = self._frame_phases.get(phase, 0)+seconds
+
+    def record_object(self, id_: str, seconds: float):
+        """Adds time spent in a method of an object to the current frame.
+
+        .. versionadded:: 0.2
+
+        :param str id_: The ID of the object
+        :param float seconds: The time spent"""
+        with self._lock:
+            self._frame_objects[id_] = self._frame_objects.get(id_, 0)+seconds
+
+    def record_event(self, event: str, seconds: float):
+        """Adds time spent dispatching an event to the current frame.
+
+        .. versionadded:: 0.2
+
+        :param str event: The name of the event
+        :param float seconds: The time spent"""
+        with self._lock:
+            self._frame_events[event] = self._frame_events.get(event, 0)+seconds
+
+    def end_frame(self):
+        """Moves the times recorded for the current frame into the ring buffers.
+
+        .. versionadded:: 0.2"""
+        with self._lock:
+            frame_phases, self._frame_phases = self._frame_phases, {}
+            frame_objects, self._frame_objects = self._frame_objects, {}
+            frame_events, self._frame_events = self._frame_events, {}
+        if not self.enabled: return
+        for phase, times in self.phases.items():
+            times.append(1000*frame_phases.get(phase, 0))
+        for kind, frame in ((self.objects, frame_objects), (self.events, frame_events)):
+            for name, seconds in frame.items():
+                if name not in kind: kind[name] = deque(maxlen=self.size)
+                kind[name].append(1000*seconds)
+
+    def clear(self):
+        """Clears everything recorded.
+
+        .. versionadded:: 0.2"""
+        for times in self.phases.values(): times.clear()
+        self.objects.clear()
+        self.events.clear()
+
+    def summary(self, top: Optional[int]=None) -> Dict[str, Dict[str, Dict[str, float]]]:
+        """Summarises the frames kept.
+
+        .. versionadded:: 0.2
+
+        :param top: If set, only include this many of the objects and events with the highest mean time
+        :type top: Optional[int]
+        :returns: A dict in the form ``{'phases'/'objects'/'events': {name: {'mean': ms, 'max': ms, 'last': ms}}}``
+        :rtype: Dict[str, Dict[str, Dict[str, float]]]"""
+        def stats(kind: Dict[str, deque], limit: Optional[int]) -> Dict[str, Dict[str, float]]:
+            result = {name: {'mean': sum(times)/len(times), 'max': max(times), 'last': times[-1]}
+                      for name, times in list(kind.items()) if len(times) != 0}
+            if limit is not None:
+                result = dict(sorted(result.items(), key=lambda i: i[1]['mean'], reverse=True)[:limit])
+            return result
+        return {'phases': stats(self.phases, None),
+                'objects': stats(self.objects, top),
+                'events': stats(self.events, top)}
+
+    def to_json(self, fp: Optional[str]=None) -> str:
+        """Exports the frames kept as JSON, in the form ``{'phases'/'objects'/'events': {name: [ms, ...]}}``.
+
+        .. versionadded:: 0.2
+
+        :param fp: If set, the file path to write the JSON to
+        :type fp: Optional[str]
+        :rtype: str"""
+        data = {'phases': {k: list(v) for k, v in self.phases.items()},
+                'objects': {k: list(v) for k, v in list(self.objects.items())},
+                'events': {k: list(v) for k, v in list(self.events.items())}}
+        out = json.dumps(data)
+        if fp is not None:
+            with open(fp, "w", encoding="utf-8") as f: f.write(out)
+        return out
+
+    def to_csv(self, fp: Optional[str]=None) -> str:
+        """Exports the frames kept as CSV, with the columns ``kind``, ``name``, ``frame`` and ``ms``.
+        ``frame`` counts back from the latest frame, which is ``0``.
+
+        .. versionadded:: 0.2
+
+        :param fp: If set, the file path to write the CSV to
+        :type fp: Optional[str]
+        :rtype: str"""
+        f = io.StringIO()
+        writer = csv.writer(f)
+        writer.writerow(['kind', 'name', 'frame', 'ms'])
+        for kind, data in (('phase', self.phases), ('object', self.objects), ('event', self.events)):
+            for name, times in list(data.items()):
+                values = list(times)
+                for i, ms in enumerate(values):
+                    writer.writerow([kind, name, len(values)-1-i, ms])
+        out = f.getvalue()
+        if fp is not None:
+            with open(fp, "w", encoding="utf-8", newline="") as f: f.write(out)
+        return out
+
+
+class ProfilerOverlay(Text):
+    """Inherited from :py:class:`~tegen.objects.Text`. Shows the mean time of each phase,
+    and the slowest objects, in the topleft corner of the screen. Enables the profiler of the game when added.
+
+    .. versionadded:: 0.2
+
+    .. py:attribute:: top
+       :type: int
+
+       The number of slowest objects to show
+
+       .. versionadded:: 0.2"""
+
+    z = 1000
+    top = 3
+    back = (0, 0, 0)
+    fore = (255, 255, 0)
+
+    def __init__(self):
+        super().__init__("")
+
+    def on_init(self, g):
+        g.profiler.enabled = True
+
+    def post_update(self, g):
+        self.x, self.y = g.screen.x, g.screen.y
+        summary = g.profiler.summary(top=self.top)
+        lines = [" ".join(f"{name} {stats['mean']:.2f}" for name, stats in summary['phases'].items()) + " ms"]
+        lines += [f"{name}: {stats['mean']:.2f} ms" for name, stats in summary['objects'].items()]
+        self.text = "\n".join(lines)
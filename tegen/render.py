@@ -0,0 +1,437 @@
+from typing import Tuple, Optional, Iterable
+import functools
+import blessed
+from blessed.colorspace import RGB_256TABLE
+import numpy as np
+import wcwidth
+
+from tegen.objects import Object, Sprite, Text, TileMap
+import tegen.pixel as pixel
+
+Cell = Tuple[Optional[Tuple[int, int, int]], Optional[Tuple[int, int, int]], Optional[str]]
+CONTINUATION = 0x110000
+"""The codepoint in :py:attr:`FrameBuffer.pixels` of cells covered by a wide character in the cell before,
+``""`` as a cell character"""
+
+class FrameBuffer:
+    """A grid of cells that the game is drawn into before being written to the terminal.
+    Stored as planes of arrays, in the same layout as :py:class:`~tegen.pixel.ArrayPixelMap`.
+
+    .. versionadded:: 0.2
+
+    :param int width: The number of columns
+    :param int height: The number of rows
+
+    .. py:attribute:: pixels
+       :type: ArrayPixelMap
+
+       The planes of the buffer, with the origin at the topleft corner
+
+       .. versionadded:: 0.2
+
+    .. py:attribute:: x
+       :type: int
+
+       The global x coordinate of the leftmost column, set when composed
+
+       .. versionadded:: 0.2
+
+    .. py:attribute:: y
+       :type: int
+
+       The global y coordinate of the topmost row, set when composed
+
+       .. versionadded:: 0.2"""
+
+    def __init__(self, width: int, height: int):
+        self.width = width
+        self.height = height
+        self.x = 0
+        self.y = 0
+        self.pixels = pixel.ArrayPixelMap.empty(width, height)
+
+    def __getitem__(self, pos: Tuple[int, int]) -> Cell:
+        x, y = pos
+        p = self.pixels
+        back = tuple(p.back[y, x].tolist()) if p.back_mask[y, x] else None
+        fore = tuple(p.fore[y, x].tolist()) if p.fore_mask[y, x] else None
+        code = int(p.char[y, x])
+        char = None if code == 0 else "" if code == CONTINUATION else chr(code)
+        return back, fore, char
+
+    def __setitem__(self, pos: Tuple[int, int], cell: Cell):
+        x, y = pos
+        back, fore, char = cell
+        p = self.pixels
+        p.back_mask[y, x] = back is not None
+        if back is not None: p.back[y, x] = back
+        p.fore_mask[y, x] = fore is not None
+        if fore is not None: p.fore[y, x] = fore
+        p.char[y, x] = 0 if char is None else CONTINUATION if char == "" else ord(char)
+
+    def size(self) -> Tuple[int, int]:
+        """Returns the size of the buffer.
+
+        .. versionadded:: 0.2
+
+        :returns: A tuple in the form ``(width, height)``
+        :rtype: Tuple[int, int]"""
+        return self.width, self.height
+
+    def clear(self):
+        """Resets every cell of the buffer to be empty.
+
+        .. versionadded:: 0.2"""
+        p = self.pixels
+        p.back_mask.fill(False)
+        p.fore_mask.fill(False)
+        p.char.fill(0)
+
+    def opaque(self) -> np.ndarray:
+        """Returns where cells have both a background colour and a character,
+        so nothing drawn under them can be seen.
+
+        .. versionadded:: 0.2
+
+        :returns: A ``bool`` array of shape ``(height, width)``
+        :rtype: numpy.ndarray"""
+        return self.pixels.back_mask & (self.pixels.char != 0)
+
+    def blit(self, pixels: pixel.ArrayPixelMap, x: int, y: int, under: bool=False):
+        """Draws an array-backed map of pixels over the buffer, clipped to the buffer.
+        Colours and characters that are not set are transparent.
+
+        .. versionadded:: 0.2
+
+        :param ArrayPixelMap pixels: The map of pixels to draw
+        :param int x: The column of the buffer to place the local coordinate ``(0, 0)`` of ``pixels`` at
+        :param int y: The row of the buffer to place the local coordinate ``(0, 0)`` of ``pixels`` at
+        :param bool under: Whether to draw under what is already in the buffer instead,
+           only filling in colours and characters that are not set, and nothing in :py:meth:`opaque` cells"""
+        w, h = pixels.size()
+        left, top = x-pixels.origin[0], y-pixels.origin[1]
+        dl, dt = max(left, 0), max(top, 0)
+        dr, db = min(left+w, self.width), min(top+h, self.height)
+        if dl >= dr or dt >= db: return
+        dst = (slice(dt, db), slice(dl, dr))
+        src = (slice(dt-top, db-top), slice(dl-left, dr-left))
+        p = self.pixels
+        if under: opaque = p.back_mask[dst] & (p.char[dst] != 0)
+        for name in ('back', 'fore'):
+            mask = getattr(pixels, name+'_mask')[src]
+            dst_mask = getattr(p, name+'_mask')[dst]
+            if under:
+                mask = mask & ~dst_mask
+                if name == 'fore': mask &= ~opaque
+            np.copyto(getattr(p, name)[dst], getattr(pixels, name)[src], where=mask[..., None])
+            dst_mask |= mask
+        char = pixels.char[src]
+        if under:
+            np.copyto(p.char[dst], char, where=p.char[dst] == 0)
+        else:
+            np.copyto(p.char[dst], char, where=char != 0)
+
+
+def compose(buffer: FrameBuffer, objects: Iterable[Object], x: int, y: int):
+    """Draws objects into a buffer, each object once, clipped to the buffer.
+    Objects later in ``objects`` are drawn over earlier ones. Colours and characters that are ``None`` are transparent.
+
+    Objects are drawn from front to back, so objects hidden behind :py:meth:`FrameBuffer.opaque` cells are skipped.
+    A character drawn over a background colour and a character hides the foreground colour under it.
+    A wide character that is partly covered is replaced by a space, as is the cell it covered,
+    so each row of the buffer is always as wide as the terminal shows it.
+
+    .. versionadded:: 0.2
+
+    :param FrameBuffer buffer: The buffer to draw into, it is cleared first
+    :param Iterable[Object] objects: The objects to draw, from back to front
+    :param int x: The global x coordinate of the leftmost column of the buffer
+    :param int y: The global y coordinate of the topmost row of the buffer"""
+    buffer.clear()
+    buffer.x, buffer.y = x, y
+    width, height = buffer.width, buffer.height
+    rx, by = x+width-1, y+height-1
+    p = buffer.pixels
+    for obj in reversed(list(objects)):
+        if isinstance(obj, TileMap):
+            for cx, cy in obj.visible_chunks(x, rx, y, by):
+                gx, gy = obj.chunk_origin(cx, cy)
+                buffer.blit(obj.chunk_pixels(cx, cy), gx-x, gy-y, under=True)
+            continue
+        if not isinstance(obj, (Sprite, Text)): continue
+        lx, orx, ty, oby = obj.edges()
+        if orx < x or lx > rx or oby < y or ty > by: continue
+        visible = (slice(max(ty-y, 0), min(oby-y+1, height)), slice(max(lx-x, 0), min(orx-x+1, width)))
+        if (p.back_mask[visible] & (p.char[visible] != 0)).all(): continue
+        ox, oy = int(obj.x)-x, int(obj.y)-y
+        if isinstance(obj, Sprite):
+            if isinstance(obj.pixels, pixel.ArrayPixelMap):
+                buffer.blit(obj.pixels, ox, oy, under=True)
+                continue
+            for (px, py), info in obj.pixels.items():
+                cx, cy = px+ox, py+oy
+                if cx < 0 or cx >= width or cy < 0 or cy >= height: continue
+                _draw_under(buffer, cx, cy, info.get('back'), info.get('fore'), info.get('char'))
+        else:
+            new_back = pixel._parse_colours(obj.back) # noqa
+            new_fore = pixel._parse_colours(obj.fore) # noqa
+            for (px, py), char in obj.get_char_positions().items():
+                cx, cy = px+ox, py+oy
+                if cx < 0 or cx >= width or cy < 0 or cy >= height: continue
+                _draw_under(buffer, cx, cy, new_back, new_fore, char)
+    _fix_wide(buffer)
+
+@functools.lru_cache(maxsize=4096)
+def _wide(code: int) -> bool:
+    """:meta private:"""
+    return wcwidth.wcwidth(chr(code)) == 2
+
+def _fix_wide(buffer: FrameBuffer):
+    """Makes every wide character in a buffer be followed by a :py:data:`CONTINUATION` cell, and every
+    :py:data:`CONTINUATION` cell follow a wide character, replacing the characters that do not with spaces.
+
+    :meta private:"""
+    char = buffer.pixels.char
+    cont = char == CONTINUATION
+    # no wide character is below U+1100
+    maybe_wide = (char >= 0x1100) & ~cont
+    if not cont.any() and not maybe_wide.any(): return
+    wide = np.zeros_like(cont)
+    if maybe_wide.any():
+        codes, inverse = np.unique(char[maybe_wide], return_inverse=True)
+        wide[maybe_wide] = np.array([_wide(c) for c in codes.tolist()], dtype=bool)[inverse]
+    followed, free = np.zeros_like(cont), np.zeros_like(cont)
+    followed[:, :-1] = cont[:, 1:]
+    free[:, :-1] = char[:, 1:] == 0
+    # a wide character of a sprite may have nothing after it, it then covers the empty cell
+    extend = wide & ~followed & free
+    char[:, 1:][extend[:, :-1]] = CONTINUATION
+    covered = wide & ~followed & ~free
+    char[covered] = ord(" ")
+    lead = np.zeros_like(cont)
+    lead[:, 1:] = (wide & ~covered)[:, :-1]
+    char[(char == CONTINUATION) & ~lead] = ord(" ")
+
+def _draw_under(buffer: FrameBuffer, x: int, y: int, new_back, new_fore, new_char):
+    """:meta private:"""
+    back, fore, char = buffer[x, y]
+    if back is not None and char is not None: return
+    buffer[x, y] = (new_back if back is None else back,
+                    new_fore if fore is None else fore,
+                    new_char if char is None else char)
+
+TRUECOLOR = 1 << 24
+"""The number of colours of terminals with 24-bit colour"""
+
+_BAYER = np.array([[0, 8, 2, 10],
+                   [12, 4, 14, 6],
+                   [3, 11, 1, 9],
+                   [15, 7, 13, 5]], dtype=np.float32)/16 + 1/32 - 0.5
+_SPREAD = {256: 51, 16: 128, 8: 255}
+
+def _depth(colors: int) -> int:
+    """:meta private:"""
+    if colors >= TRUECOLOR: return TRUECOLOR
+    for depth in (256, 16, 8):
+        if colors >= depth: return depth
+    return 0
+
+@functools.lru_cache(maxsize=None)
+def palette(colors: int) -> np.ndarray:
+    """Returns the colours of the palette of a terminal, as the xterm defaults.
+
+    .. versionadded:: 0.2
+
+    :param int colors: The number of colours of the terminal, rounded down to ``256``, ``16`` or ``8``
+    :returns: A ``uint8`` array of shape ``(colors, 3)``
+    :rtype: numpy.ndarray
+    :raises ValueError: if ``colors`` is less than ``8`` or is :py:data:`TRUECOLOR`"""
+    depth = _depth(colors)
+    if depth == 0 or depth == TRUECOLOR:
+        raise ValueError(f"Terminals with {colors} colours have no palette")
+    return np.array([tuple(c) for c in RGB_256TABLE[:depth]], dtype=np.uint8)
+
+@functools.lru_cache(maxsize=None)
+def lut(colors: int) -> np.ndarray:
+    """Returns the lookup table from colours to the index of the nearest colour in :py:func:`palette`,
+    with 32 levels for each channel. On terminals with 256 colours, only indices 16 to 255 are used,
+    as the first 16 colours depend on the theme of the terminal.
+
+    .. versionadded:: 0.2
+
+    :param int colors: The number of colours of the terminal
+    :returns: A ``uint8`` array of shape ``(32, 32, 32)``, indexed by each channel shifted right by 3
+    :rtype: numpy.ndarray"""
+    start = 16 if _depth(colors) == 256 else 0
+    pal = palette(colors)[start:].astype(np.float32)
+    levels = np.arange(32, dtype=np.float32)*8 + 4
+    result = np.empty((32, 32, 32), dtype=np.uint8)
+    gb = np.stack(np.meshgrid(levels, levels, indexing='ij'), axis=-1).reshape(-1, 1, 2)
+    dg, db = (gb[..., 0]-pal[:, 1])**2, (gb[..., 1]-pal[:, 2])**2
+    for i, red in enumerate(levels):
+        # weighted by how sensitive the eye is to each channel, as in the "redmean" distance
+        r = (red+pal[:, 0])/2
+        dist = (2+r/256)*(red-pal[:, 0])**2 + 4*dg + (2+(255-r)/256)*db
+        result[i] = dist.argmin(axis=1).reshape(32, 32)+start
+    return result
+
+def quantise(rgb: np.ndarray, colors: int) -> np.ndarray:
+    """Maps colours to the index of the nearest colour in :py:func:`palette` through :py:func:`lut`.
+
+    .. versionadded:: 0.2
+
+    :param numpy.ndarray rgb: A ``uint8`` array of colours, with the channels in the last axis
+    :param int colors: The number of colours of the terminal
+    :returns: A ``uint8`` array of indices, of the shape of ``rgb`` without the last axis
+    :rtype: numpy.ndarray"""
+    i = rgb >> 3
+    return lut(colors)[i[..., 0], i[..., 1], i[..., 2]]
+
+def dither(pixels: pixel.ArrayPixelMap, colors: int) -> pixel.ArrayPixelMap:
+    """Returns a map of pixels with its colours replaced by colours of :py:func:`palette`, with ordered dithering.
+    Use on image sprites before they are drawn on terminals with fewer colours than :py:data:`TRUECOLOR`,
+    to keep their gradients. The masks and characters are shared, not copied.
+
+    .. versionadded:: 0.2
+
+    :param ArrayPixelMap pixels: The map of pixels to dither
+    :param int colors: The number of colours of the terminal
+    :rtype: ArrayPixelMap"""
+    depth = _depth(colors)
+    if depth == 0 or depth == TRUECOLOR: return pixels
+    pal = palette(depth)
+    w, h = pixels.size()
+    threshold = np.tile(_BAYER, ((h+3)//4, (w+3)//4))[:h, :w, None]*_SPREAD[depth]
+    planes = {}
+    for name in ('back', 'fore'):
+        rgb = np.clip(getattr(pixels, name)+threshold, 0, 255).astype(np.uint8)
+        planes[name] = pal[quantise(rgb, depth)]
+    return pixel.ArrayPixelMap(planes['back'], pixels.back_mask, planes['fore'], pixels.fore_mask,
+                               pixels.char, pixels.origin)
+
+
+class Encoder:
+    """Encodes frame buffers as terminal output.
+    A colour is only written when it differs from the colour of the previous cell written,
+    and the escape sequences of colours are cached.
+    On terminals with fewer colours than :py:data:`TRUECOLOR`, colours are mapped to the palette of the terminal
+    with :py:func:`quantise`, and written as indices of the palette.
+
+    .. versionadded:: 0.2
+
+    :param term: The terminal to encode for. If ``None``, 24-bit colour ANSI escape sequences are used
+    :type term: Optional[blessed.Terminal]
+    :param int cache_size: The maximum number of escape sequences to cache for each of the background and foreground
+    :param colors: The number of colours to encode for, defaults to the number of colours of ``term``,
+       read once, or :py:data:`TRUECOLOR` if ``term`` is ``None``
+    :type colors: Optional[int]
+
+    .. py:attribute:: colors
+       :type: int
+
+       The number of colours encoded for, one of :py:data:`TRUECOLOR`, ``256``, ``16``, ``8``,
+       or ``0`` if colours are not written
+
+       .. versionadded:: 0.2"""
+
+    def __init__(self, term: Optional[blessed.Terminal], cache_size: int=4096, colors: Optional[int]=None):
+        self.term = term
+        if colors is None: colors = term.number_of_colors if term is not None else TRUECOLOR
+        self.colors = _depth(colors)
+        if term is None:
+            back_style = lambda c: "\x1b[48;2;%d;%d;%dm" % (c >> 16, c >> 8 & 255, c & 255)
+            fore_style = lambda c: "\x1b[38;2;%d;%d;%dm" % (c >> 16, c >> 8 & 255, c & 255)
+            self._move = lambda x, y: "\x1b[%d;%dH" % (y+1, x+1)
+            self._normal, self._clear_eos = "\x1b[m", "\x1b[J"
+        else:
+            back_style = lambda c: str(term.on_color_rgb(c >> 16, c >> 8 & 255, c & 255))
+            fore_style = lambda c: str(term.color_rgb(c >> 16, c >> 8 & 255, c & 255))
+            self._move = term.move_xy
+            self._normal, self._clear_eos = str(term.normal), str(term.clear_eos)
+        if self.colors == 256:
+            back_style = lambda i: "\x1b[48;5;%dm" % i
+            fore_style = lambda i: "\x1b[38;5;%dm" % i
+        elif self.colors in (16, 8):
+            back_style = lambda i: "\x1b[%dm" % (40+i if i < 8 else 92+i)
+            fore_style = lambda i: "\x1b[%dm" % (30+i if i < 8 else 82+i)
+        self._back_style = functools.lru_cache(maxsize=cache_size)(back_style)
+        self._fore_style = functools.lru_cache(maxsize=cache_size)(fore_style)
+
+    def _colours(self, rgb: np.ndarray) -> list:
+        """:meta private:"""
+        if self.colors == TRUECOLOR:
+            rgb = rgb.astype(np.uint32)
+            return (rgb[:, 0] << 16 | rgb[:, 1] << 8 | rgb[:, 2]).tolist()
+        return quantise(rgb, self.colors).tolist()
+
+    def diff(self, front: Optional[FrameBuffer], back: FrameBuffer) -> str:
+        """Encodes the cells of ``back`` that differ from ``front``.
+        If ``front`` is ``None`` or of a different size, the whole of ``back`` is repainted.
+
+        .. versionadded:: 0.2
+
+        :param front: The buffer currently shown on the terminal
+        :type front: Optional[FrameBuffer]
+        :param FrameBuffer back: The buffer to be shown
+        :rtype: str"""
+        move, normal = self._move, self._normal
+        width = back.width
+        out = []
+        if front is None or front.size() != back.size():
+            index = np.arange(width*back.height)
+            repaint = True
+        else:
+            index = _changed(front.pixels, back.pixels)
+            # a wide character is written again when the cell it covers changes
+            conts = index[back.pixels.char.reshape(-1)[index] == CONTINUATION]
+            if len(conts) != 0: index = np.union1d(index, conts-1)
+            repaint = False
+        p = back.pixels
+        if self.colors == 0:
+            backs = fores = back_masks = fore_masks = [False]*len(index)
+        else:
+            backs = self._colours(p.back.reshape(-1, 3)[index])
+            back_masks = p.back_mask.reshape(-1)[index].tolist()
+            fores = self._colours(p.fore.reshape(-1, 3)[index])
+            fore_masks = p.fore_mask.reshape(-1)[index].tolist()
+        chars = p.char.reshape(-1)[index].tolist()
+
+        back_style, fore_style = self._back_style, self._fore_style
+        cur_back, cur_fore = None, None
+        cursor = -1
+        lead = -2
+        for i, b, bm, f, fm, c in zip(index.tolist(), backs, back_masks, fores, fore_masks, chars):
+            if c == CONTINUATION:
+                # only covered if the wide character before it was just written
+                if i == lead+1 and i % width != 0: continue
+                c = 0
+            if i != cursor or i % width == 0:
+                out.append(move(i % width, i // width))
+            if not bm: b = None
+            if not fm: f = None
+            if (b is None and cur_back is not None) or (f is None and cur_fore is not None):
+                out.append(normal)
+                cur_back, cur_fore = None, None
+            if b != cur_back:
+                out.append(back_style(b))
+                cur_back = b
+            if f != cur_fore:
+                out.append(fore_style(f))
+                cur_fore = f
+            out.append(" " if c == 0 else chr(c))
+            cursor = i+1
+            lead = -2
+            if c >= 0x1100 and _wide(c):
+                lead = i
+                cursor = i+2
+        if cur_back is not None or cur_fore is not None: out.append(normal)
+        if repaint: out.append(self._clear_eos)
+        return "".join(out)
+
+
+def _changed(front: pixel.ArrayPixelMap, back: pixel.ArrayPixelMap) -> np.ndarray:
+    """:meta private:"""
+    changed = (front.back_mask != back.back_mask) | (front.fore_mask != back.fore_mask) | (front.char != back.char)
+    changed |= back.back_mask & (front.back != back.back).any(axis=2)
+    changed |= back.fore_mask & (front.fore != back.fore).any(axis=2)
+    return np.flatnonzero(changed)
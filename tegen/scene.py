@@ -1,11 +1,92 @@
-from typing import Dict
+from typing import Dict, List, Optional, Set, Tuple
+import io
+import pickle
+import struct
+import sys
 
 from tegen.objects import Screen, Object
+import tegen.pixel as pixel
+
+_MAGIC = b"TGNS"
+_VERSION = 1
+_HEADER = struct.Struct("<4sB3xQ")
+_CELL = 64
+_SAFE_GLOBALS = {('tegen.pixel', 'ArrayPixelMap'), ('tegen.pixel', 'Animation'), ('tegen.pixel', '_animation_from_atlas'),
+                 ('numpy', 'dtype'), ('numpy', 'ndarray'),
+                 ('numpy.core.multiarray', '_reconstruct'), ('numpy._core.multiarray', '_reconstruct'),
+                 ('numpy.core.numeric', '_frombuffer'), ('numpy._core.numeric', '_frombuffer'),
+                 ('numpy.core.multiarray', 'scalar'), ('numpy._core.multiarray', 'scalar'),
+                 ('collections', 'OrderedDict'), ('collections', 'deque'),
+                 ('builtins', 'set'), ('builtins', 'frozenset'), ('builtins', 'bytearray'),
+                 ('builtins', 'complex'), ('builtins', 'range'), ('builtins', 'slice')}
+_registered: Set[type] = set()
+
+class _Pickler(pickle.Pickler):
+    """Pickles maps of pixels and animations once, and refers to them by index after.
+
+    :meta private:"""
+
+    def __init__(self, file, assets: list, indices: Dict[int, int]):
+        super().__init__(file, protocol=pickle.HIGHEST_PROTOCOL)
+        self.assets = assets
+        self.indices = indices
+
+    def persistent_id(self, obj):
+        if not isinstance(obj, (pixel.ArrayPixelMap, pixel.Animation)): return None
+        if id(obj) not in self.indices:
+            self.indices[id(obj)] = len(self.assets)
+            self.assets.append(obj)
+        return self.indices[id(obj)]
+
+class _Unpickler(pickle.Unpickler):
+    """Only loads the globals in ``_SAFE_GLOBALS``, subclasses of :py:class:`Object` and classes registered with
+    :py:meth:`Scene.register_class`, from modules that are already imported.
+
+    :meta private:"""
+
+    def __init__(self, file, assets: list):
+        super().__init__(file)
+        self.assets = assets
+
+    def persistent_load(self, pid):
+        return self.assets[pid]
+
+    def find_class(self, module, name):
+        if (module, name) in _SAFE_GLOBALS:
+            return super().find_class(module, name)
+        mod = sys.modules.get(module)
+        if mod is not None and not any(part.startswith('__') for part in name.split('.')):
+            obj = mod
+            for part in name.split('.'):
+                obj = getattr(obj, part, None)
+            if isinstance(obj, type) and (issubclass(obj, Object) or obj in _registered):
+                return obj
+        raise pickle.UnpicklingError(f"'{module}.{name}' is not allowed in a scene file, "
+                                     "see Scene.register_class()")
+
+
+class _SceneFile:
+    """The contents of a scene file, with objects unpickled when needed.
+
+    :meta private:"""
+
+    def __init__(self, data: bytes, assets: list, base: int):
+        self.data = data
+        self.assets = assets
+        self.base = base
+
+    def build(self, offset: int, length: int) -> Object:
+        start = self.base+offset
+        return _Unpickler(io.BytesIO(self.data[start:start+length]), self.assets).load()
+
 
 class Scene:
     """A game scene.
     
     .. versionadded:: 0.0
+
+    .. versionchanged:: 0.2
+       Can be saved to a file with :py:meth:`save`, and loaded with :py:meth:`load`, see :py:meth:`register_class`
     
     .. py:attribute:: objects
        :type: Dict[str, Object]
@@ -14,6 +95,9 @@ class Scene:
 
     def __init__(self):
         self.objects: Dict[str, Object] = {}
+        self._pending: Dict[int, tuple] = {}
+        self._cells: Dict[Tuple[int, int], List[int]] = {}
+        self._file: Optional[_SceneFile] = None
 
     def add_object(self, obj: Object, id_: str, x: float, y: float, override: bool=False):
         """Adds an :py:class:`Object` to the scene.
@@ -57,8 +141,152 @@ class Scene:
         :raises TypeError: if the class is not a subclass of :py:class:`Object`"""
         if not issubclass(cls, Object):
             raise TypeError("Class is not subclass of Object")
-        for id_, obj in self.objects.items():
+        for id_, obj in list(self.objects.items()):
             if isinstance(obj, cls):
                 del self.objects[id_]
 
-        
+    @staticmethod
+    def register_class(cls: type) -> type:
+        """Allows instances of a class to be loaded by :py:meth:`load`, when they are in the attributes of objects.
+        Subclasses of :py:class:`Object` are always allowed. Can be used as a decorator.
+
+        .. versionadded:: 0.2
+
+        :param type cls: The class
+        :returns: The class
+        :rtype: type"""
+        _registered.add(cls)
+        return cls
+
+    def pending(self) -> int:
+        """Returns the number of objects loaded by :py:meth:`load` that have not been built yet.
+
+        .. versionadded:: 0.2
+
+        :rtype: int"""
+        return len(self._pending)
+
+    def materialise(self, lx: float, rx: float, ty: float, by: float) -> Dict[str, Object]:
+        """Builds the objects that have not been built yet and were within a rectangle when saved,
+        and adds them to :py:attr:`objects`.
+
+        .. versionadded:: 0.2
+
+        :param float lx: The global x coordinate of the leftmost column of the rectangle
+        :param float rx: The global x coordinate of the rightmost column of the rectangle
+        :param float ty: The global y coordinate of the topmost row of the rectangle
+        :param float by: The global y coordinate of the bottommost row of the rectangle
+        :returns: The objects built, in the form of ``{id: object}``
+        :rtype: Dict[str, Object]"""
+        result = {}
+        if len(self._pending) == 0: return result
+        pending = self._pending
+        for cx in range(int(lx)//_CELL, int(rx)//_CELL+1):
+            for cy in range(int(ty)//_CELL, int(by)//_CELL+1):
+                bucket = self._cells.get((cx, cy))
+                if bucket is None: continue
+                for i in bucket:
+                    record = pending.get(i)
+                    if record is None: continue
+                    olx, orx, oty, oby = record[1]
+                    if orx < lx or olx > rx or oby < ty or oty > by: continue
+                    del pending[i]
+                    result[record[0]] = self._build(record)
+                bucket[:] = [i for i in bucket if i in pending]
+                if len(bucket) == 0: del self._cells[cx, cy]
+        return result
+
+    def materialise_all(self) -> Dict[str, Object]:
+        """Builds every object that has not been built yet, and adds them to :py:attr:`objects`.
+
+        .. versionadded:: 0.2
+
+        :returns: The objects built, in the form of ``{id: object}``
+        :rtype: Dict[str, Object]"""
+        result = {record[0]: self._build(record) for record in self._pending.values()}
+        self._pending.clear()
+        self._cells.clear()
+        return result
+
+    def _build(self, record: tuple, add: bool=True) -> Object:
+        """:meta private:"""
+        obj = self._file.build(record[2], record[3])
+        if add: self.objects[record[0]] = obj
+        return obj
+
+    def save(self, fp: str):
+        """Saves the scene to a file. Objects are pickled, so their attributes must be picklable.
+        Maps of pixels and animations shared by objects are saved once,
+        and pixels of the class of an object are not saved, but referred to by the class.
+        Objects of the scene that have not been built yet are saved too.
+
+        .. versionadded:: 0.2
+
+        :param str fp: The file path to save to"""
+        assets, indices = [], {}
+        records, blobs = [], []
+        offset = 0
+        objects = [(id_, obj) for id_, obj in self.objects.items()]
+        objects += [(record[0], self._build(record, add=False)) for record in self._pending.values()]
+        for id_, obj in objects:
+            f = io.BytesIO()
+            _Pickler(f, assets, indices).dump(obj)
+            blob = f.getvalue()
+            records.append((id_, _box(obj), offset, len(blob)))
+            blobs.append(blob)
+            offset += len(blob)
+        index = pickle.dumps((records, assets), protocol=pickle.HIGHEST_PROTOCOL)
+        with open(fp, "wb") as f:
+            f.write(_HEADER.pack(_MAGIC, _VERSION, len(index)))
+            f.write(index)
+            for blob in blobs: f.write(blob)
+
+    @classmethod
+    def load(cls, fp: str, lazy: bool=True) -> 'Scene':
+        """Loads a scene saved by :py:meth:`save`.
+        If ``lazy``, objects that had edges when saved are not built until :py:meth:`materialise` is called
+        with a rectangle near them, which the game does for the area around the screen every tick.
+
+        Only subclasses of :py:class:`Object`, classes of :py:mod:`tegen.pixel`, numpy arrays, builtin types,
+        and classes registered with :py:meth:`register_class` are loaded, from modules that are already imported.
+
+        .. warning::
+
+           Scene files are pickles. Loading is restricted to the classes above, but their ``__setstate__``
+           and the ``on_init`` of loaded objects still run, so only load files from sources you trust.
+
+        .. versionadded:: 0.2
+
+        :param str fp: The file path to load from
+        :param bool lazy: Whether to build objects only when they are near the screen
+        :rtype: Scene
+        :raises ValueError: if the file is not a scene file
+        :raises pickle.UnpicklingError: if the file contains a class that is not allowed"""
+        with open(fp, "rb") as f: data = f.read()
+        if len(data) < _HEADER.size:
+            raise ValueError(f"{fp} is not a scene file")
+        magic, version, length = _HEADER.unpack_from(data)
+        if magic != _MAGIC or version != _VERSION:
+            raise ValueError(f"{fp} is not a scene file of version {_VERSION}")
+        records, assets = _Unpickler(io.BytesIO(data[_HEADER.size:_HEADER.size+length]), []).load()
+        scene = cls()
+        scene._file = _SceneFile(data, assets, _HEADER.size+length)
+        for i, record in enumerate(records):
+            if not lazy or record[1] is None:
+                scene._build(record)
+                continue
+            scene._pending[i] = record
+            lx, rx, ty, by = record[1]
+            for cx in range(lx//_CELL, rx//_CELL+1):
+                for cy in range(ty//_CELL, by//_CELL+1):
+                    scene._cells.setdefault((cx, cy), []).append(i)
+        return scene
+
+
+def _box(obj: Object) -> Optional[Tuple[int, int, int, int]]:
+    """:meta private:"""
+    edges = obj.edges()
+    if edges is None: return None
+    lx, rx, ty, by = edges
+    if any(abs(v) == float("inf") for v in edges) or lx > rx or ty > by: return None
+    return int(lx), int(rx), int(ty), int(by)
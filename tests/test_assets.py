@@ -0,0 +1,27 @@
+import pytest
+
+from tegen import pixel
+from tegen.assets import AssetCache
+
+
+@pytest.mark.parametrize("kwargs", [dict(char=['a ', '  '], anchor='br'),
+                                    dict(back=[['f00', None]], fore=[['0f0', '00f']], char=['x ']),
+                                    dict(fore=[['f00', 'aaa']], anchor='center')])
+def test_from_2d_array(tmp_path, kwargs):
+    expected = pixel.from_2d_array(**kwargs)
+    assert AssetCache(str(tmp_path)).from_2d_array(**kwargs) == expected
+    assert AssetCache(str(tmp_path)).from_2d_array(**kwargs) == expected
+    cached = AssetCache(str(tmp_path)).from_2d_array(as_array=True, **kwargs)
+    assert cached.to_dict() == pixel.from_2d_array(as_array=True, **kwargs).to_dict()
+
+
+def test_from_image_key(tmp_path):
+    from PIL import Image
+    fp = str(tmp_path / "image.png")
+    Image.new("RGB", (3, 2), (255, 0, 0)).save(fp)
+    cache = AssetCache(str(tmp_path / "cache"))
+    first = cache.from_image(fp, as_array=True)
+    assert cache.from_image(fp, size=None, anchor='tl', as_array=True) is first
+    assert cache.from_image(fp) == pixel.from_image(fp)
+    assert cache.from_image(fp, anchor='br', as_array=True) is not first
+    assert len(list((tmp_path / "cache").rglob("*.tgna"))) == 2
@@ -0,0 +1,38 @@
+from tegen import pixel
+from tegen.collision import CollisionWorld
+from tegen.objects import Sprite
+
+
+def make_sprite(x: int, y: int, char) -> Sprite:
+    sprite = Sprite()
+    sprite.pixels = pixel.from_2d_array(char=char)
+    sprite.x, sprite.y = x, y
+    return sprite
+
+
+def test_pairs_once():
+    world = CollisionWorld(cell_size=2)
+    a = make_sprite(0, 0, ["#"*8]*8)
+    b = make_sprite(3, 3, ["#"*8]*8)
+    c = make_sprite(20, 20, ["#"])
+    for sprite in (a, b, c): world.add(sprite)
+    assert world.pairs() == [(a, b)] or world.pairs() == [(b, a)]
+    assert world.collides(a, b) and not world.collides(a, c)
+    assert world.query_rect(0, 3, 0, 3) == [a, b] or world.query_rect(0, 3, 0, 3) == [b, a]
+
+
+def test_collides_after_pixel_swap():
+    world = CollisionWorld()
+    a = make_sprite(0, 0, ["###", "###", "###"])
+    b = make_sprite(1, 1, ["##", "##"])
+    world.add(a)
+    world.add(b)
+    assert world.collides(a, b)
+    a.pixels = pixel.from_2d_array(char=["#"])
+    assert world.collides(a, b) and len(world.pairs()) == 1
+    assert world.query_point(2, 2) == [a, b] or world.query_point(2, 2) == [b, a]
+    world.sync()
+    assert not world.collides(a, b) and world.pairs() == []
+    a.pixels = pixel.from_2d_array(char=["   ", "  #", "   "])
+    world.sync()
+    assert world.collides(a, b) and len(world.pairs()) == 1
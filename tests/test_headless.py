@@ -0,0 +1,191 @@
+import pytest
+
+import tegen
+from tegen.objects import Object, Text
+from tegen.render import Encoder
+from tegen.scene import Scene
+
+
+class Tracked(Object):
+    def __init__(self, log: list):
+        self.log = log
+
+    def on_init(self, g):
+        self.log.append(("init", self.id))
+
+    def on_end(self, g):
+        self.log.append(("end", self.id))
+
+
+class Other(Tracked):
+    pass
+
+
+def make_game(**kwargs) -> tegen.Game:
+    return tegen.Game(headless=True, size=kwargs.pop("size", (10, 2)), **kwargs)
+
+
+def test_add_remove_outside_frame():
+    g = make_game()
+    log = []
+    g.add_object(Tracked(log), "a", 0, 0)
+    assert "a" in g.objects and log == [("init", "a")]
+    with pytest.raises(KeyError):
+        g.add_object(Tracked(log), "a", 0, 0)
+    before = g.objects
+    g.remove_object_by_id("a")
+    assert "a" not in g.objects and "a" in before
+    assert log == [("init", "a"), ("end", "a")]
+    g.remove_object_by_id("a")
+    with pytest.raises(KeyError):
+        g.remove_object_by_id("a", nonexist_error=True)
+
+
+def test_add_remove_during_frame():
+    log = []
+    seen = {}
+
+    class Spawner(Object):
+        def update(self, g):
+            objects = g.objects
+            g.add_object(Tracked(log), "child", 0, 0)
+            g.remove_object_by_id("old")
+            seen['objects'] = objects is g.objects and "child" not in objects and "old" in objects
+            seen['pending'] = g.has_object("child") and not g.has_object("old")
+            seen['child'] = g.get_object("child")
+            with pytest.raises(KeyError):
+                g.add_object(Tracked(log), "child", 0, 0)
+
+    g = make_game()
+    g.add_object(Tracked(log), "old", 0, 0)
+    g.add_object(Spawner(), "spawner", 0, 0)
+    log.clear()
+    g.step()
+    assert seen['objects'] and seen['pending']
+    assert g.objects["child"] is seen['child']
+    assert "old" not in g.objects
+    assert log == [("init", "child"), ("end", "old")]
+    assert len(g.draw_order()) == len(g.objects)
+
+
+def test_remove_object_by_class():
+    log = []
+    g = make_game()
+    for i in range(3): g.add_object(Tracked(log), "t"+str(i), 0, 0)
+    g.add_object(Other(log), "o", 0, 0)
+    assert g.remove_object_by_class(Other) == 1
+    assert sorted(g.objects) == ["t0", "t1", "t2"]
+    with pytest.raises(TypeError):
+        g.remove_object_by_class(int)
+
+    counts = []
+
+    class Remover(Object):
+        def update(self, g):
+            counts.append(g.remove_object_by_class(Tracked))
+            counts.append(len(g.objects))
+
+    g.add_object(Remover(), "remover", 0, 0)
+    g.step()
+    assert counts == [3, 4]
+    assert list(g.objects) == ["remover"]
+
+
+def test_scene_remove_object_by_class():
+    scene = Scene()
+    for i in range(3): scene.add_object(Tracked([]), "t"+str(i), 0, 0)
+    scene.add_object(Other([]), "o", 0, 0)
+    scene.remove_object_by_class(Tracked)
+    assert scene.objects == {}
+
+
+def test_switch_scene():
+    log = []
+
+    class Parent(Tracked):
+        def on_init(self, g):
+            super().on_init(g)
+            g.add_object(Text("child"), "child", 0, 0)
+
+    g = make_game()
+    with pytest.raises(RuntimeError):
+        g.switch_scene()
+    g.add_object(Tracked(log), "old", 0, 0)
+    scene = Scene()
+    scene.add_object(Parent(log), "parent", 0, 0)
+    g.preload_scene(scene).result(timeout=5)
+    g.step()
+    assert list(g.objects) == ["old"] and "child" not in g.objects
+    g.switch_scene()
+    g.step()
+    assert sorted(g.objects) == ["child", "parent"]
+    assert g.current_scene is scene
+    assert log == [("init", "old"), ("end", "old"), ("init", "parent")]
+    g.step()
+    assert g.screenshot().splitlines()[0] == "child     "
+
+
+def test_encoder_diff():
+    g = make_game(size=(6, 2))
+    text = Text("ab", fore=(255, 0, 0))
+    g.add_object(text, "text", 1, 0)
+    g.step()
+    encoder = Encoder(None)
+    assert encoder.diff(None, g.front_buffer) == \
+        "\x1b[1;1H \x1b[38;2;255;0;0mab\x1b[m   \x1b[2;1H      \x1b[J"
+    g.step()
+    assert encoder.diff(g.back_buffer, g.front_buffer) == ""
+    text.text = "ax"
+    g.step()
+    assert encoder.diff(g.back_buffer, g.front_buffer) == "\x1b[1;3H\x1b[38;2;255;0;0mx\x1b[m"
+    assert g.screenshot() == " ax   \n      "
+
+
+@pytest.mark.parametrize("cover, row", [(0, "X ab  "), (1, " Xab  ")])
+def test_wide_character_partly_covered(cover, row):
+    g = make_game(size=(6, 1))
+    g.add_object(Text("漢ab"), "text", 0, 0)
+    top = Text("X")
+    top.z = 1
+    g.add_object(top, "top", cover, 0)
+    g.step()
+    assert Encoder(None).diff(None, g.front_buffer) == "\x1b[1;1H" + row + "\x1b[J"
+
+
+def test_wide_character_diff():
+    g = make_game(size=(6, 1))
+    text = Text("漢ab")
+    g.add_object(text, "text", 0, 0)
+    g.step()
+    encoder = Encoder(None)
+    encoder.diff(None, g.front_buffer)
+    text.text = "a字b"
+    g.step()
+    assert encoder.diff(g.back_buffer, g.front_buffer) == "\x1b[1;1Ha字"
+
+
+def test_screenshot_wide_characters():
+    g = make_game(size=(6, 2))
+    g.add_object(Text("漢ab"), "text", 0, 0)
+    top = Text("X")
+    top.z = 1
+    g.add_object(top, "top", 1, 1)
+    g.add_object(Text("字"), "wide", 0, 1)
+    g.step()
+    assert g.screenshot() == "漢ab  \n X    "
+
+
+def test_draw_order():
+    g = make_game()
+    a, b = Text("a"), Text("b")
+    g.add_object(a, "a", 0, 0)
+    g.add_object(b, "b", 0, 0)
+    assert g.draw_order() == [a, b]
+    a.z = 1
+    order = g.draw_order()
+    assert order == [b, a]
+    order.clear()
+    a.z = 0
+    assert g.draw_order() == [a, b]
+    g.step()
+    assert g.screenshot().splitlines()[0][0] == "b"
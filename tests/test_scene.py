@@ -0,0 +1,71 @@
+import io
+import os
+import pickle
+
+import numpy as np
+import pytest
+
+import tegen
+from tegen import pixel
+from tegen.objects import Sprite
+from tegen.scene import Scene, _Unpickler
+
+
+class Mover(Sprite):
+    def __init__(self):
+        self.speed = np.float64(1.0)
+        self.path = np.arange(4, dtype=np.int16)
+
+
+def test_save_load(tmp_path):
+    shared = pixel.from_2d_array(char=["ab"], as_array=True)
+    scene = Scene()
+    for i in range(2):
+        sprite = Sprite()
+        sprite.pixels = shared
+        scene.add_object(sprite, "s"+str(i), i, 0)
+    scene.add_object(Mover(), "mover", 5, 5)
+    fp = tmp_path / "scene.tgs"
+    scene.save(str(fp))
+
+    loaded = Scene.load(str(fp), lazy=False)
+    assert sorted(loaded.objects) == ["mover", "s0", "s1"]
+    assert loaded.objects["s0"].pixels is loaded.objects["s1"].pixels
+    assert loaded.objects["s0"].pixels.to_dict() == shared.to_dict()
+    mover = loaded.objects["mover"]
+    assert (mover.x, mover.y) == (5, 5)
+    assert mover.speed == 1.0 and type(mover.speed) is np.float64
+    assert mover.path.tolist() == [0, 1, 2, 3]
+
+
+def test_load_lazy(tmp_path):
+    scene = Scene()
+    scene.add_object(Sprite(), "near", 0, 0)
+    scene.add_object(Mover(), "far", 1000, 0)
+    fp = tmp_path / "scene.tgs"
+    scene.save(str(fp))
+
+    loaded = Scene.load(str(fp))
+    assert loaded.objects == {} and loaded.pending() == 2
+    g = tegen.Game(headless=True, size=(10, 2))
+    g.load_scene(loaded)
+    g.step()
+    assert "near" in g.objects and "far" not in g.objects
+    assert loaded.pending() == 1
+
+    fp2 = tmp_path / "resaved.tgs"
+    loaded.save(str(fp2))
+    assert sorted(Scene.load(str(fp2), lazy=False).objects) == ["far", "near"]
+
+    g.screen.x = 1000
+    g.step()
+    assert "far" in g.objects and loaded.pending() == 0
+    assert g.objects["far"].speed == 1.0
+
+
+def test_unpickler_rejects_globals():
+    data = pickle.dumps(os.system, protocol=pickle.HIGHEST_PROTOCOL)
+    with pytest.raises(pickle.UnpicklingError):
+        _Unpickler(io.BytesIO(data), []).load()
+    with pytest.raises(pickle.UnpicklingError):
+        _Unpickler(io.BytesIO(pickle.dumps(Scene)), []).load()
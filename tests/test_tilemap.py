@@ -0,0 +1,30 @@
+import numpy as np
+import pytest
+
+from tegen import pixel
+from tegen.objects import TileMap
+
+
+def make_tilemap(**kwargs) -> TileMap:
+    return TileMap([pixel.from_2d_array(char=["a"]), pixel.from_2d_array(char=["b"])], chunk_size=4, **kwargs)
+
+
+def test_lookup_keeps_no_chunk(tmp_path):
+    tilemap = make_tilemap()
+    assert tilemap.get_tile(100, -100) == TileMap.EMPTY
+    tilemap.chunk_pixels(3, 3)
+    chunk = tilemap.chunk(5, 5)
+    assert (chunk == TileMap.EMPTY).all()
+    with pytest.raises(ValueError):
+        chunk[0, 0] = 1
+    assert tilemap._chunks == {}
+
+    tilemap.set_tile(5, 1, 1)
+    tilemap.chunk(2, 0, create=True)[0, 0] = 0
+    assert sorted(tilemap._chunks) == [(1, 0), (2, 0)]
+    tilemap.save(str(tmp_path))
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["1_0.npy", "2_0.npy"]
+
+    loaded = make_tilemap(directory=str(tmp_path))
+    assert loaded.get_tile(5, 1) == 1 and loaded.get_tile(8, 0) == 0
+    assert np.array_equal(loaded.chunk(1, 0), tilemap.chunk(1, 0))